@@ -4,6 +4,9 @@ from app.api.users import router as users_router
 # from app.api.roles import router as roles_router
 # from app.api.permissions import router as permissions_router
 from app.api.menus import router as menus_router
+from app.api.profiling import router as profiling_router
+from app.api.slow_queries import router as slow_queries_router
+from app.api.batch import router as batch_router
 
 # 创建API路由
 api_router = APIRouter(prefix="/api")
@@ -14,3 +17,6 @@ api_router.include_router(users_router, tags=["用户"])
 # api_router.include_router(roles_router, tags=["角色"])
 # api_router.include_router(permissions_router, tags=["权限"])
 api_router.include_router(menus_router, tags=["菜单"])
+api_router.include_router(profiling_router, tags=["性能分析"])
+api_router.include_router(slow_queries_router, tags=["慢查询"])
+api_router.include_router(batch_router, tags=["批量请求"])
@@ -1,20 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
 from sqlmodel import Session
 from datetime import timedelta
-from app.core.auth import authenticate_user, create_access_token
+from uuid import uuid4
+from app.core.auth import authenticate_user, create_access_token, build_token_claims, oauth2_scheme
+from app.core.config import settings
 from app.core.database import get_session
-from typing import Dict, Any
+from app.core.ratelimit import client_ip, login_limiter
+from app.core.redis import RedisUnavailableError
+from app.core.tokens import RefreshTokenStore, revocation_list
+from app.models.rbac import User
+from app.models.token import TokenRefresh, TokenRevoke
+from typing import Dict, Any, Optional
 
 router = APIRouter()
 
 
+async def _issue_tokens(user: User, db: Session) -> Dict[str, Any]:
+    """签发访问令牌和刷新令牌"""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = await build_token_claims(user, db)
+    access_token = create_access_token(
+        data={"sub": user.username, **claims}, expires_delta=access_token_expires
+    )
+    refresh_token = await RefreshTokenStore.issue(user.id, user.username)
+
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+        "refresh_token": refresh_token,
+        "username": user.username,
+        "is_superuser": user.is_superuser
+    }
+
+
 @router.post("/token")
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """获取访问令牌"""
+    # 在密码校验之前限流，被限流的请求不消耗bcrypt计算
+    user_key = f"user:{form_data.username}"
+    ip_key = f"ip:{client_ip(request)}"
+    attempt = uuid4().hex
+    allowed, retry_after = await login_limiter.hit([
+        (user_key, settings.LOGIN_MAX_ATTEMPTS_PER_USER),
+        (ip_key, settings.LOGIN_MAX_ATTEMPTS_PER_IP),
+    ], member=attempt)
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="登录尝试过于频繁，请稍后再试",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(
@@ -23,14 +66,78 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=300)  # 默认300分钟
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    # 登录成功后清除该用户名的计数，并撤销本次对IP的计数（IP只限制失败次数，
+    # 同一出口IP后的大量正常用户不会互相限流）
+    await login_limiter.reset(user_key)
+    await login_limiter.forget(ip_key, attempt)
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "username": user.username,
-        "is_superuser": user.is_superuser
-    }
+    return await _issue_tokens(user, db)
+
+
+@router.post("/token/refresh")
+async def refresh_access_token(
+    body: TokenRefresh,
+    db: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    """使用刷新令牌换取新的令牌对（旧刷新令牌立即作废）"""
+    try:
+        data = await RefreshTokenStore.consume(body.refresh_token)
+    except RedisUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="令牌服务暂不可用"
+        )
+
+    user = db.get(User, data["uid"]) if data else None
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="刷新令牌无效或已过期",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return await _issue_tokens(user, db)
+
+
+@router.post("/logout")
+async def logout(
+    body: Optional[TokenRevoke] = None,
+    token: str = Depends(oauth2_scheme)
+) -> Dict[str, Any]:
+    """注销：吊销当前访问令牌及（可选）刷新令牌"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except jwt.JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的认证凭据",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if payload.get("jti"):
+        await revocation_list.revoke(payload["jti"], payload["exp"])
+
+    if body and body.refresh_token:
+        try:
+            await RefreshTokenStore.revoke(body.refresh_token)
+        except RedisUnavailableError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="令牌服务暂不可用"
+            )
+
+    return {"message": "已注销"}
+
+
+@router.post("/token/revoke")
+async def revoke_refresh_token(body: TokenRefresh) -> Dict[str, Any]:
+    """吊销刷新令牌"""
+    try:
+        await RefreshTokenStore.revoke(body.refresh_token)
+    except RedisUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="令牌服务暂不可用"
+        )
+
+    return {"message": "已吊销"}
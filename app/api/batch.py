@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlmodel import Session
+from typing import Any, Dict, Optional
+from app.core.auth import get_current_active_user, get_token_claims, oauth2_scheme
+from app.core.batch import BatchExecutor, validate_items
+from app.core.config import settings
+from app.core.database import get_session
+from app.models.rbac import User
+from app.models.batch import BatchRequest
+
+router = APIRouter()
+
+
+@router.post("/batch")
+async def batch(
+    request: Request,
+    body: BatchRequest,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+    claims: Optional[Dict[str, Any]] = Depends(get_token_claims)
+):
+    """批量请求
+
+    在一次往返中执行多个接口调用，认证只进行一次；结果按请求顺序返回，
+    每项包含id、status、headers（ETag等）和body。连续的GET请求并发执行，其余请求按顺序执行。
+    """
+    # 只允许批量调用同一前缀下的接口
+    batch_path = request.scope["route"].path
+    error = validate_items(body.requests, batch_path.rsplit("/", 1)[0], batch_path)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+    auth = {"token": token, "user": current_user, "claims": claims}
+    # 每个并发子请求占用一个数据库连接，为其他请求保留至少一半连接池
+    concurrency = max(1, min(settings.BATCH_MAX_CONCURRENCY, settings.DB_POOL_SIZE // 2))
+    executor = BatchExecutor(request, auth, db, concurrency)
+    return await executor.execute(body.requests)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from typing import Any, Dict
+from app.core.health import health_checker
+
+router = APIRouter(prefix="/health")
+
+
+@router.get("/live")
+async def liveness() -> Dict[str, Any]:
+    """存活检查，进程能响应即返回200"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness():
+    """就绪检查，依赖不可用、连接池饱和或启动未完成时返回503"""
+    ready, detail = await health_checker.readiness()
+    return JSONResponse(detail, status_code=200 if ready else 503)
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session
 from typing import List, Dict, Any
 from app.core.database import get_session
-from app.core.auth import get_current_active_user
+from app.core.auth import get_current_active_user, get_rbac_version
+from app.core.conditional import make_etag, not_modified, set_etag
+from app.core.versions import menu_version
+from app.core.serialization import JSONBytesResponse, menu_adapter, menu_list_adapter, serialize_list, serialize_model
+from app.core.response_cache import ResponseCache
 from app.models.rbac import User
 from app.models.menu import Menu, MenuCreate, MenuUpdate, MenuRead
 from app.services.menu import MenuService
@@ -15,38 +19,62 @@ async def read_menus(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    cache: ResponseCache = Depends(ResponseCache.tagged("menus"))
 ):
     """获取菜单列表"""
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
     menus = await MenuService.get_menus(db, skip, limit)
-    return menus
+    return await cache.store(JSONBytesResponse(serialize_list(menu_list_adapter, menus)))
 
 
 @router.get("/menus/tree", response_model=List[Dict[str, Any]])
 async def read_menu_tree(
-    db: Session = Depends(get_session),
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """获取完整菜单树"""
-    return await MenuService.get_menu_tree(db)
+    # 菜单版本未变化时直接返回304，无需构建菜单树
+    etag = make_etag("menu-tree", await menu_version.current())
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    return set_etag(JSONBytesResponse(await MenuService.get_menu_tree_json()), etag)
 
 
 @router.get("/menus/user-tree", response_model=List[Dict[str, Any]])
 async def read_user_menu_tree(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """获取当前用户的菜单树"""
-    return await MenuService.get_user_menu_tree(db, current_user.id)
+    # 菜单树取决于菜单版本和当前用户的权限（RBAC版本）
+    rbac = await get_rbac_version()
+    etag = make_etag("user-tree", current_user.id, await menu_version.current(), rbac) if rbac else None
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    return set_etag(JSONBytesResponse(await MenuService.get_user_menu_tree_json(db, current_user.id)), etag)
 
 
 @router.get("/menus/{menu_id}", response_model=MenuRead)
 async def read_menu(
     menu_id: int,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    cache: ResponseCache = Depends(ResponseCache.tagged("menus"))
 ):
     """获取菜单详情"""
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
     menu = await MenuService.get_menu_by_id(db, menu_id)
     if not menu:
         raise HTTPException(
@@ -54,7 +82,7 @@ async def read_menu(
             detail="菜单不存在"
         )
     
-    return menu
+    return await cache.store(JSONBytesResponse(serialize_model(menu_adapter, menu)))
 
 
 @router.post("/menus", response_model=MenuRead)
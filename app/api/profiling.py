@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Any, Dict, List
+from app.core.auth import get_current_superuser
+from app.core.config import settings
+from app.core.profiling import (
+    PROFILE_HEADER, ProfileStore, profile_toggle, sign_profile_header, to_collapsed, to_speedscope
+)
+from app.core.redis import RedisUnavailableError
+from app.models.profiling import ProfileToggleCreate
+from app.models.rbac import User
+
+router = APIRouter(prefix="/profiling")
+
+
+def _require_enabled():
+    """性能分析未启用时返回404"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="性能分析未启用")
+
+
+@router.post("/header", dependencies=[Depends(_require_enabled)])
+async def create_profile_header(
+    ttl: int = 300,
+    current_user: User = Depends(get_current_superuser)
+) -> Dict[str, Any]:
+    """生成签名的性能分析请求头，带该请求头的请求会被分析"""
+    ttl = max(1, min(ttl, settings.PROFILING_HEADER_MAX_TTL))
+    return {"header": PROFILE_HEADER, "value": sign_profile_header(ttl), "expires_in": ttl}
+
+
+@router.post("/toggle", dependencies=[Depends(_require_enabled)])
+async def enable_profile_toggle(
+    toggle: ProfileToggleCreate,
+    current_user: User = Depends(get_current_superuser)
+) -> Dict[str, Any]:
+    """在指定时间内分析路径匹配前缀的请求（所有worker生效）"""
+    try:
+        await profile_toggle.enable(toggle.path_prefix, toggle.duration)
+    except RedisUnavailableError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Redis不可用")
+    return {"path_prefix": toggle.path_prefix, "duration": toggle.duration}
+
+
+@router.delete("/toggle", dependencies=[Depends(_require_enabled)])
+async def disable_profile_toggle(current_user: User = Depends(get_current_superuser)) -> Dict[str, Any]:
+    """关闭性能分析开关"""
+    try:
+        await profile_toggle.disable()
+    except RedisUnavailableError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Redis不可用")
+    return {"message": "性能分析开关已关闭"}
+
+
+@router.get("/profiles", dependencies=[Depends(_require_enabled)])
+async def read_profiles(
+    limit: int = 50,
+    current_user: User = Depends(get_current_superuser)
+) -> List[Dict[str, Any]]:
+    """获取最近的性能分析结果列表"""
+    try:
+        return await ProfileStore.list(limit)
+    except RedisUnavailableError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Redis不可用")
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(_require_enabled)])
+async def download_profile(
+    profile_id: str,
+    format: str = "speedscope",
+    current_user: User = Depends(get_current_superuser)
+):
+    """下载性能分析结果，format为speedscope（JSON）或collapsed（折叠调用栈文本）"""
+    profile = await ProfileStore.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="性能分析结果不存在")
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            to_collapsed(profile),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'}
+        )
+    if format == "speedscope":
+        return to_speedscope(profile)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不支持的格式")
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Dict, List
+from app.core.auth import get_current_superuser
+from app.core.slowlog import slow_query_log
+from app.models.rbac import User
+
+router = APIRouter(prefix="/slow-queries")
+
+
+def _require_enabled():
+    """慢查询日志未启用时返回404"""
+    if slow_query_log is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="慢查询日志未启用")
+
+
+@router.get("", dependencies=[Depends(_require_enabled)])
+async def read_slow_queries(
+    limit: int = 20,
+    order_by: str = "total",
+    current_user: User = Depends(get_current_superuser)
+) -> List[Dict[str, Any]]:
+    """获取当前worker的慢查询统计，order_by可选 total / count / max"""
+    return slow_query_log.top(limit, order_by)
+
+
+@router.delete("", dependencies=[Depends(_require_enabled)])
+async def reset_slow_queries(current_user: User = Depends(get_current_superuser)) -> Dict[str, Any]:
+    """清空当前worker的慢查询统计"""
+    slow_query_log.reset()
+    return {"message": "慢查询统计已清空"}
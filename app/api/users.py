@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session
 from typing import List
 from app.core.database import get_session
 from app.core.auth import get_current_active_user
+from app.core.conditional import make_etag, not_modified, set_etag
+from app.core.versions import user_version
+from app.core.serialization import JSONBytesResponse, user_adapter, user_list_adapter, serialize_list, serialize_model
+from app.core.response_cache import ResponseCache
 from app.models.rbac import User, UserCreate, UserUpdate, UserRead
 from app.services.user import UserService
 
@@ -11,14 +15,21 @@ router = APIRouter()
 
 @router.get("/users", response_model=List[UserRead])
 async def read_users(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """获取用户列表"""
+    # 用户数据版本未变化时直接返回304，无需查询数据库
+    etag = make_etag("users", await user_version.current(), skip, limit)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
     users = await UserService.get_users(db, skip, limit)
-    return users
+    return set_etag(JSONBytesResponse(serialize_list(user_list_adapter, users)), etag)
 
 
 @router.post("/users", response_model=UserRead)
@@ -52,9 +63,14 @@ async def create_user(
 async def read_user(
     user_id: int,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    cache: ResponseCache = Depends(ResponseCache.tagged("users"))
 ):
     """获取用户详情"""
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
     user = await UserService.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
@@ -62,7 +78,7 @@ async def read_user(
             detail="用户不存在"
         )
 
-    return user
+    return await cache.store(JSONBytesResponse(serialize_model(user_adapter, user)))
 
 
 @router.put("/users/{user_id}", response_model=UserRead)
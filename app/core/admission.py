@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+from itertools import count
+from typing import List, Optional, Tuple
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .config import settings
+from .metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, REQUESTS_SHED
+
+# 请求优先级，数值越小越优先
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+# 拒绝原因
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+POOL_TIMEOUT = "pool_timeout"
+
+
+def overloaded_response(reason: str) -> JSONResponse:
+    """过载时的快速失败响应"""
+    REQUESTS_SHED.labels(reason).inc()
+    return JSONResponse(
+        {"detail": "服务繁忙，请稍后重试"},
+        status_code=503,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)}
+    )
+
+
+class AdmissionController:
+    """进程内准入控制
+
+    最多同时处理max_concurrency个请求，其余请求进入有界等待队列，按优先级（同优先级先来先服务）
+    获得释放的名额；队列已满或等待超时的请求直接拒绝。低优先级请求最多占用low_priority_share比例的
+    并发名额和队列长度，高优先级请求不受队列长度限制。
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, low_priority_share: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.low_priority_share = low_priority_share
+        self.active = 0
+        self.queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = count()
+
+    def _concurrency_limit(self, priority: int) -> int:
+        if priority == LOW:
+            return max(1, int(self.max_concurrency * self.low_priority_share))
+        return self.max_concurrency
+
+    def _queue_limit(self, priority: int) -> Optional[int]:
+        if priority == HIGH:
+            return None
+        if priority == LOW:
+            return int(self.max_queue * self.low_priority_share)
+        return self.max_queue
+
+    async def acquire(self, priority: int) -> Optional[str]:
+        """申请处理名额，成功返回None，被拒绝时返回原因"""
+        if self.queued == 0 and self.active < self._concurrency_limit(priority):
+            self.active += 1
+            self._report()
+            return None
+
+        queue_limit = self._queue_limit(priority)
+        if queue_limit is not None and self.queued >= queue_limit:
+            return QUEUE_FULL
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.queued += 1
+        self._wake()
+        self._report()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+            return None
+        except asyncio.TimeoutError:
+            # 超时与获得名额同时发生时以获得名额为准
+            if future.done() and not future.cancelled():
+                return None
+            return QUEUE_TIMEOUT
+        except asyncio.CancelledError:
+            # 已获得名额但在恢复执行前被取消（如客户端断开），归还名额，否则并发容量会永久减少
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            self.queued -= 1
+            self._report()
+
+    def release(self):
+        """释放名额并唤醒等待者"""
+        self.active -= 1
+        self._wake()
+        self._report()
+
+    def _report(self):
+        """更新指标"""
+        ADMISSION_ACTIVE.set(self.active)
+        ADMISSION_QUEUED.set(self.queued)
+
+    def _wake(self):
+        """按优先级把空闲名额交给等待者"""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.active >= self._concurrency_limit(priority):
+                break
+            heapq.heappop(self._waiters)
+            self.active += 1
+            future.set_result(True)
+
+
+class AdmissionMiddleware:
+    """准入控制中间件
+
+    健康检查等旁路路径不受限制；认证路径为高优先级，重量级列表路径为低优先级，其余为普通优先级。
+    被拒绝的请求立即返回503和Retry-After，不再占用数据库连接池。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: "AdmissionController",
+        bypass_paths: List[str],
+        high_priority_paths: List[str],
+        low_priority_paths: List[str],
+    ):
+        self.app = app
+        self.controller = controller
+        self.bypass_paths = tuple(bypass_paths)
+        self.high_priority_paths = tuple(high_priority_paths)
+        self.low_priority_paths = set(low_priority_paths)
+
+    def _priority(self, scope: Scope) -> int:
+        path = scope["path"]
+        if path.startswith(self.high_priority_paths):
+            return HIGH
+        if scope["method"] == "GET" and path in self.low_priority_paths:
+            return LOW
+        return NORMAL
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(self.bypass_paths):
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await self.controller.acquire(self._priority(scope))
+        if rejected is not None:
+            await overloaded_response(rejected)(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+async def pool_timeout_handler(request: Request, exc: Exception) -> JSONResponse:
+    """数据库连接池获取超时时快速返回503，而不是让请求继续排队"""
+    return overloaded_response(POOL_TIMEOUT)
+
+
+# 全局准入控制器
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    low_priority_share=settings.ADMISSION_LOW_PRIORITY_SHARE
+)
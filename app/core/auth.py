@@ -1,13 +1,22 @@
+import time
 from datetime import timedelta
+from functools import lru_cache
+from uuid import uuid4
 from app.utils.timezone import utc_now
 from typing import Optional, Dict, Any
 from jose import jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
+from .batch import batch_auth
 from .config import settings
-from .database import get_session
+from .database import engine
+from .metrics import PASSWORD_HASH_LATENCY
+from .singleflight import single_flight
+from .versions import rbac_version
+from .tokens import revocation_list
 from app.models.rbac import User, Role, UserRole, Permission, RolePermission
 
 # 密码上下文
@@ -16,23 +25,44 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2密码Bearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
+# 权限代码到ID的进程内映射，按RBAC版本失效
+_permission_ids: Dict[str, int] = {}
+_permission_ids_version: Optional[str] = None
+
 # 验证密码
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        PASSWORD_HASH_LATENCY.labels("verify").observe(time.perf_counter() - start)
 
 # 生成密码哈希
 def get_password_hash(password: str) -> str:
     """生成密码哈希"""
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        PASSWORD_HASH_LATENCY.labels("hash").observe(time.perf_counter() - start)
+
+# 占位密码哈希
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    """用于未知用户的占位哈希，使其验证耗时与真实用户一致"""
+    return get_password_hash(uuid4().hex)
 
 # 验证用户
 async def authenticate_user(username: str, password: str, db: Session) -> Optional[User]:
     """验证用户"""
     user = db.exec(select(User).where(User.username == username)).first()
     if not user:
+        # 对未知用户同样执行一次哈希校验，避免通过响应时间枚举用户名
+        await run_in_threadpool(lambda: verify_password(password, _dummy_password_hash()))
         return None
-    if not verify_password(password, user.password):
+    # bcrypt校验耗时数百毫秒，在线程池中执行，不阻塞事件循环
+    if not await run_in_threadpool(verify_password, password, user.password):
         return None
     return user
 
@@ -45,12 +75,99 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = utc_now() + timedelta(minutes=30)  # 默认30分钟
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid4().hex)  # 令牌ID，用于吊销
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")  # 使用HS256算法
     return encoded_jwt
 
+# 获取RBAC版本号
+async def get_rbac_version() -> Optional[str]:
+    """获取全局RBAC版本号，Redis不可用且本地无缓存时返回None"""
+    return await rbac_version.get()
+
+# 更新RBAC版本号
+async def bump_rbac_version() -> str:
+    """更新全局RBAC版本号，使已签发令牌中的权限声明失效"""
+    return await rbac_version.bump()
+
+# 生成令牌权限声明
+async def build_token_claims(user: User, db: Session) -> Dict[str, Any]:
+    """生成内嵌到访问令牌中的紧凑声明
+
+    uid: 用户ID，su: 是否超级管理员，rv: RBAC版本号，
+    perms: 权限ID位图（十六进制）或 pids: 权限ID列表，取两者中较短的一种（见_encode_permissions）
+    """
+    if not settings.JWT_EMBED_CLAIMS or not user.is_active:
+        return {}
+
+    version = await rbac_version.current()
+
+    permission_ids = db.exec(
+        select(RolePermission.permission_id)
+        .join(UserRole, UserRole.role_id == RolePermission.role_id)
+        .where(UserRole.user_id == user.id)
+    ).all()
+
+    return {
+        "uid": user.id,
+        "su": user.is_superuser,
+        **_encode_permissions(permission_ids),
+        "rv": version
+    }
+
+# 编码权限ID集合
+def _encode_permissions(permission_ids) -> Dict[str, Any]:
+    """权限ID集合的紧凑表示
+
+    位图长度随最大权限ID增长，ID较大且稀疏时改用ID列表，两者取较短的一种。
+    """
+    ids = sorted(set(permission_ids))
+    bitmap_size = ids[-1] // 4 + 1 if ids else 1
+    list_size = sum(len(str(i)) + 1 for i in ids)
+    if bitmap_size > list_size:
+        return {"pids": ids}
+    bits = 0
+    for permission_id in ids:
+        bits |= 1 << permission_id
+    return {"perms": format(bits, "x")}
+
+# 权限集合标识
+def claims_permissions_key(claims: Dict[str, Any]) -> str:
+    """令牌声明中权限集合的标识，权限相同的声明标识相同"""
+    if "pids" in claims:
+        return ",".join(map(str, claims["pids"]))
+    return claims["perms"]
+
+def _claims_grant(claims: Dict[str, Any], permission_id: int) -> bool:
+    """令牌声明中是否包含该权限ID"""
+    if "pids" in claims:
+        return permission_id in claims["pids"]
+    return bool(int(claims["perms"], 16) >> permission_id & 1)
+
+async def _fresh_claims(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """校验声明的RBAC版本是否为最新
+
+    只与Redis中的版本号比较：Redis降级时本地版本号可能已过期（如熔断期间禁用了用户），
+    此时不信任声明，回退到数据库查询。
+    """
+    if not settings.JWT_EMBED_CLAIMS or "uid" not in payload or "rv" not in payload:
+        return None
+    version = await rbac_version.get(authoritative=True)
+    if version is None or payload["rv"] != version:
+        return None
+    return payload
+
 # 获取当前用户
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)) -> User:
+async def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme)
+) -> User:
     """获取当前用户"""
+    # 批量请求的子请求已在批量请求上完成认证
+    auth = batch_auth(request.scope, token)
+    if auth is not None:
+        request.state.token_claims = auth["claims"]
+        return auth["user"]
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的认证凭据",
@@ -64,10 +181,49 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except jwt.JWTError:
         raise credentials_exception
 
-    user = db.exec(select(User).where(User.username == username)).first()
-    if user is None:
+    # 检查令牌是否已吊销（绝大多数情况由本地布隆过滤器直接判定）
+    jti = payload.get("jti")
+    if jti and await revocation_list.is_revoked(jti):
         raise credentials_exception
-    return user
+
+    # 声明有效时直接由令牌构造用户，无需查询数据库（禁用用户和修改超管标记都会更新RBAC版本）；
+    # 版本不一致或Redis降级时回退到数据库查询
+    claims = await _fresh_claims(payload)
+    # 保存校验结果，get_token_claims直接复用，不再重复解码和读取版本号
+    request.state.token_claims = claims
+    if claims is not None:
+        return User(
+            id=claims["uid"],
+            username=username,
+            email="",
+            password="",
+            is_active=True,
+            is_superuser=claims["su"]
+        )
+
+    # 同一用户的并发请求只查询一次数据库，查询在线程池中使用独立会话执行，不阻塞事件循环；
+    # 合并的是字段数据而非ORM对象，每个请求各自构造与会话无关的User
+    data = await single_flight.do(f"user:{username}", lambda: run_in_threadpool(_load_user_data, username))
+    if data is None:
+        raise credentials_exception
+    return User.model_validate(data)
+
+def _load_user_data(username: str) -> Optional[Dict[str, Any]]:
+    """查询用户字段数据"""
+    with Session(engine) as db:
+        user = db.exec(select(User).where(User.username == username)).first()
+        return user.model_dump() if user is not None else None
+
+# 获取令牌声明
+async def get_token_claims(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+) -> Optional[Dict[str, Any]]:
+    """令牌中的权限声明，声明缺失或RBAC版本已变化时返回None
+
+    解码和版本校验由get_current_user完成（同一请求中只执行一次），这里只读取其结果。
+    """
+    return getattr(request.state, "token_claims", None)
 
 # 获取当前活跃用户
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -76,13 +232,62 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="用户已被禁用")
     return current_user
 
+# 获取当前超级管理员
+async def get_current_superuser(current_user: User = Depends(get_current_active_user)) -> User:
+    """获取当前超级管理员，非超级管理员返回403"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要超级管理员权限")
+    return current_user
+
+# 获取权限ID
+async def _get_permission_id(permission_code: str, version: str, db: Session) -> Optional[int]:
+    """获取权限代码对应的ID，结果按RBAC版本缓存"""
+    global _permission_ids_version
+    if _permission_ids_version != version:
+        _permission_ids.clear()
+        _permission_ids_version = version
+    if permission_code not in _permission_ids:
+        permission_id = db.exec(
+            select(Permission.id).where(Permission.code == permission_code)
+        ).first()
+        if permission_id is None:
+            return None
+        _permission_ids[permission_code] = permission_id
+    return _permission_ids[permission_code]
+
+# 预加载权限ID
+async def preload_permission_ids(db: Session) -> int:
+    """一次性加载全部权限代码到ID的映射，返回加载数量（查询在线程池中执行，不阻塞事件循环）"""
+    global _permission_ids_version
+    version = await rbac_version.current()
+    rows = await run_in_threadpool(lambda: db.exec(select(Permission.code, Permission.id)).all())
+    _permission_ids.clear()
+    _permission_ids.update(dict(rows))
+    _permission_ids_version = version
+    return len(rows)
+
 # 检查用户是否有特定权限
-async def check_permission(user: User, permission_code: str, db: Session) -> bool:
-    """检查用户是否有特定权限"""
+async def check_permission(
+    user: User,
+    permission_code: str,
+    db: Session,
+    claims: Optional[Dict[str, Any]] = None
+) -> bool:
+    """检查用户是否有特定权限
+
+    传入有效的令牌声明（见get_token_claims）时直接根据其中的权限集合判断。
+    """
     # 超级管理员拥有所有权限
     if user.is_superuser:
         return True
 
+    # 使用令牌中的权限集合
+    if claims is not None:
+        permission_id = await _get_permission_id(permission_code, claims["rv"], db)
+        if permission_id is None:
+            return False
+        return _claims_grant(claims, permission_id)
+
     # 获取用户角色
     user_roles = db.exec(
         select(Role).join(UserRole).where(UserRole.user_id == user.id)
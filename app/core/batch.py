@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+from starlette.requests import Request
+from starlette.types import Message, Scope
+from .config import settings
+from .serialization import JSONBytesResponse, json_dumps
+from app.models.batch import BatchRequestItem
+
+logger = logging.getLogger(__name__)
+
+# 子请求scope中的扩展键（客户端无法设置scope，只能由批量接口写入）
+BATCH_AUTH_SCOPE = "app.batch_auth"
+BATCH_SESSION_SCOPE = "app.batch_session"
+
+# 只读方法的子请求并发执行，其余方法按顺序执行
+READ_METHODS = {"GET", "HEAD"}
+ALLOWED_METHODS = READ_METHODS | {"POST", "PUT", "PATCH", "DELETE"}
+
+# 不从批量请求继承的请求头（子请求不压缩，条件请求和请求体由子请求自行指定）
+_DROPPED_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"if-none-match", b"if-match"}
+# 子请求不允许覆盖的请求头，认证只在批量请求上进行一次
+_PROTECTED_HEADERS = {"authorization", "host", "content-length"}
+# 返回给调用方的子响应头
+_RESULT_HEADERS = {"etag", "retry-after", "location", "x-cache"}
+
+
+def batch_auth(scope: Scope, token: str) -> Optional[Dict[str, Any]]:
+    """批量子请求中已完成的认证结果（令牌与批量请求一致时有效）"""
+    auth = scope.get(BATCH_AUTH_SCOPE)
+    if auth is not None and auth["token"] == token:
+        return auth
+    return None
+
+
+def validate_items(items: List[BatchRequestItem], prefix: str, batch_path: str) -> Optional[str]:
+    """校验子请求（只允许prefix下的接口，不允许嵌套批量请求），不合法时返回原因"""
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        return f"批量请求最多包含{settings.BATCH_MAX_REQUESTS}个子请求"
+    for item in items:
+        if item.method.upper() not in ALLOWED_METHODS:
+            return f"不支持的请求方法: {item.method}"
+        if not item.path.startswith(prefix + "/") or item.path.rstrip("/") == batch_path:
+            return f"不支持的请求路径: {item.path}"
+    return None
+
+
+class _SubResponse:
+    """收集子请求的响应"""
+
+    def __init__(self):
+        self.status = 500
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body: List[bytes] = []
+        self.complete = asyncio.Event()
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            self.body.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                self.complete.set()
+
+    def render(self, item: BatchRequestItem) -> bytes:
+        """序列化为结果项，JSON响应体直接拼接，不重新解析和编码"""
+        content_type = b""
+        headers = {}
+        for name, value in self.headers:
+            name = name.lower()
+            if name == b"content-type":
+                content_type = value
+            elif name.decode("latin-1") in _RESULT_HEADERS:
+                headers[name.decode("latin-1")] = value.decode("latin-1")
+
+        body = b"".join(self.body)
+        if not body:
+            body = b"null"
+        elif not content_type.startswith(b"application/json"):
+            body = json_dumps(body.decode(errors="replace"))
+
+        head = json_dumps({"id": item.id, "status": self.status, "headers": headers})
+        return head[:-1] + b',"body":' + body + b"}"
+
+
+class BatchExecutor:
+    """批量请求执行器
+
+    子请求与普通请求一样经过完整的中间件栈（准入控制按子请求自身的优先级申请名额，并计入指标和性能分析），
+    共享批量请求的认证结果：令牌解码、吊销检查和用户查询只在批量请求上执行一次；
+    写请求可能改变调用者自身的角色或状态，执行写请求后不再共享认证结果。
+    连续的只读子请求并发执行（最多max_concurrency个），各自使用独立的数据库会话（会话不是线程安全的）；
+    写请求按顺序逐个执行，共用批量请求的数据库会话，每个写请求结束后回滚未提交的改动。
+    """
+
+    def __init__(self, request: Request, auth: Dict[str, Any], session: Any, max_concurrency: int):
+        self.request = request
+        self.auth: Optional[Dict[str, Any]] = auth
+        self.session = session
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _scope(self, item: BatchRequestItem, body: bytes) -> Scope:
+        parent = self.request.scope
+        headers = [(name, value) for name, value in parent["headers"] if name not in _DROPPED_HEADERS]
+        for name, value in item.headers.items():
+            if name.lower() not in _PROTECTED_HEADERS:
+                headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+        if body:
+            headers.append((b"content-type", b"application/json"))
+            headers.append((b"content-length", str(len(body)).encode()))
+
+        root_path = parent.get("root_path", "")
+        scope = {
+            key: parent[key]
+            for key in ("type", "asgi", "http_version", "scheme", "server", "client")
+            if key in parent
+        }
+        scope["state"] = dict(parent.get("state", {}))
+        scope.update(
+            method=item.method.upper(),
+            root_path=root_path,
+            path=root_path + item.path,
+            raw_path=(root_path + item.path).encode(),
+            query_string=urlencode(item.query, doseq=True).encode(),
+            headers=headers,
+        )
+        if self.auth is not None:
+            scope[BATCH_AUTH_SCOPE] = self.auth
+        if item.method.upper() not in READ_METHODS:
+            scope[BATCH_SESSION_SCOPE] = self.session
+        return scope
+
+    async def _run(self, item: BatchRequestItem) -> bytes:
+        body = json_dumps(item.body) if item.body is not None else b""
+        response = _SubResponse()
+        received = False
+
+        async def receive() -> Message:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await response.complete.wait()
+            return {"type": "http.disconnect"}
+
+        try:
+            await self.request.app(self._scope(item, body), receive, response.send)
+        except Exception:
+            logger.exception(f"批量子请求 {item.method} {item.path} 执行失败")
+            response = _SubResponse()
+            response.headers = [(b"content-type", b"application/json")]
+            response.body = [json_dumps({"detail": "Internal Server Error"})]
+        return response.render(item)
+
+    async def _run_read(self, item: BatchRequestItem) -> bytes:
+        async with self._semaphore:
+            return await self._run(item)
+
+    async def _run_write(self, item: BatchRequestItem) -> bytes:
+        try:
+            return await self._run(item)
+        finally:
+            # 丢弃子请求未提交的改动，避免带入下一个写请求的事务
+            self.session.rollback()
+            # 写请求可能修改了调用者自身的角色或状态，之后的子请求重新认证
+            self.auth = None
+
+    async def execute(self, items: List[BatchRequestItem]) -> JSONBytesResponse:
+        """按顺序执行子请求，返回与请求顺序一致的结果列表"""
+        results: List[bytes] = []
+        reads: List[BatchRequestItem] = []
+        for item in items + [None]:
+            if item is not None and item.method.upper() in READ_METHODS:
+                reads.append(item)
+                continue
+            # 遇到写请求（或结束）时先完成之前的只读请求，保证写请求前后的读取顺序
+            if reads:
+                results.extend(await asyncio.gather(*(self._run_read(read) for read in reads)))
+                reads = []
+            if item is not None:
+                results.append(await self._run_write(item))
+        return JSONBytesResponse(b"[" + b",".join(results) + b"]")
@@ -0,0 +1,137 @@
+import zlib
+from typing import List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .static import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # 未安装时只提供gzip
+    brotli = None
+
+
+class _Compressor:
+    """增量压缩器，每个分块后同步刷新，保证流式响应能及时送达客户端"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """响应压缩中间件
+
+    - 按Accept-Encoding协商br/gzip（br需安装brotli）
+    - 只压缩匹配内容类型规则的响应，已带Content-Encoding的响应（如预压缩文件）和范围响应（206）原样通过
+    - 压缩后的字节与原响应不同，上游的强ETag改为弱ETag
+    - 单块响应小于最小尺寸时不压缩；流式响应逐块压缩并刷新
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types: Optional[List[str]] = None,
+        excluded_content_types: Optional[List[str]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = content_types or ["application/json", "text/"]
+        self.excluded_content_types = excluded_content_types or ["text/event-stream"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope))
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            encoding = None
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] == 206
+                    or "content-range" in headers
+                    or not self._compressible(headers.get("content-type", ""))
+                )
+                if passthrough:
+                    await send(message)
+                elif encoding is None:
+                    # 客户端不接受压缩时原样返回，但响应内容仍随Accept-Encoding变化
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                    passthrough = True
+                    await send(message)
+                else:
+                    # 等到第一个响应体分块再决定是否压缩
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start_message)
+                    await send(message)
+                    passthrough = True
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag is not None and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                    data = compressor.compress(body, final=False)
+                else:
+                    data = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            data = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compressible(self, content_type: str) -> bool:
+        """内容类型是否需要压缩"""
+        content_type = content_type.lower()
+        if any(content_type.startswith(t) for t in self.excluded_content_types):
+            return False
+        return any(content_type.startswith(t) for t in self.content_types)
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """根据版本号等组成部分生成弱ETag"""
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """If-None-Match命中时返回304响应，否则返回None"""
+    if etag is None:
+        return None
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+
+    # 弱比较：忽略 W/ 前缀
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+
+def set_etag(response: Response, etag: Optional[str]) -> Response:
+    """为响应设置ETag，要求客户端每次重新验证"""
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -9,14 +9,116 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     SECRET_KEY: str = "your-secret-key-change-in-production"
 
+    # 令牌配置
+    JWT_EMBED_CLAIMS: bool = False  # 在访问令牌中内嵌用户ID、超管标记、权限集合和RBAC版本（可选，默认关闭）
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # 访问令牌有效期（分钟）
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # 刷新令牌有效期（天）
+    REVOCATION_BLOOM_CAPACITY: int = 100000  # 吊销布隆过滤器预计容量
+    REVOCATION_SYNC_INTERVAL: float = 5.0  # 从Redis同步吊销列表的间隔（秒）
+
+    # 登录限流配置
+    LOGIN_RATE_LIMIT_WINDOW: int = 60  # 滑动窗口长度（秒）
+    LOGIN_MAX_ATTEMPTS_PER_USER: int = 5  # 每个用户名窗口内最多尝试次数
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 20  # 每个IP窗口内最多失败次数（登录成功不计入）
+    TRUSTED_PROXIES: List[str] = []  # 受信任的反向代理地址或网段，来自这些地址的请求按X-Forwarded-For确定客户端IP
+
+    # 序列化与缓存配置
+    FAST_JSON: bool = False  # 启用后（需安装orjson）所有JSON响应和缓存序列化改用orjson编码
+    MENU_TREE_CACHE_TTL: int = 300  # 序列化后菜单树的缓存时间（秒）
+    RESPONSE_CACHE_ENABLED: bool = True  # 缓存已认证GET接口的响应
+    RESPONSE_CACHE_TTL: int = 60  # 响应缓存时间（秒）
+    SINGLE_FLIGHT_DISTRIBUTED: bool = True  # 通过Redis锁跨进程合并缓存未命中时的重建
+    SINGLE_FLIGHT_LOCK_TTL: int = 10  # 合并锁有效期（秒）
+    SINGLE_FLIGHT_WAIT: float = 5.0  # 等待其他进程重建的最长时间（秒），超时后自行计算
+
+    # 响应压缩配置
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESSION_GZIP_LEVEL: int = 6  # gzip压缩级别（1-9）
+    COMPRESSION_BROTLI_QUALITY: int = 4  # brotli压缩质量（0-11，需安装brotli）
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "text/", "application/javascript", "image/svg+xml"]
+
+    # 监控指标配置
+    METRICS_ENABLED: bool = True  # 安装了prometheus_client时在 /metrics 导出指标
+    METRICS_AUTH_TOKEN: Optional[str] = None  # 抓取 /metrics 所需的Bearer令牌，未配置时只允许本机访问
+
+    # 性能分析配置
+    PROFILING_ENABLED: bool = False  # 安装按需性能分析中间件（关闭时无任何开销）
+    PROFILING_INTERVAL: float = 0.005  # 采样间隔（秒）
+    PROFILING_RETENTION: int = 86400  # 分析结果保留时间（秒）
+    PROFILING_HEADER_MAX_TTL: int = 3600  # 签名请求头的最长有效期（秒）
+
+    # 过载保护配置
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64  # 每个worker同时处理的最大请求数
+    ADMISSION_MAX_QUEUE: int = 128  # 等待队列长度，队列满时直接返回503
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0  # 排队等待的最长时间（秒）
+    ADMISSION_LOW_PRIORITY_SHARE: float = 0.5  # 低优先级请求最多占用的并发和队列比例
+    ADMISSION_RETRY_AFTER: int = 1  # 503响应的Retry-After（秒）
+    ADMISSION_BYPASS_PATHS: List[str] = ["/health", "/metrics", "/api/batch"]  # 不受准入控制的路径前缀（批量请求的子请求各自申请名额）
+    ADMISSION_HIGH_PRIORITY_PATHS: List[str] = ["/api/token", "/api/logout"]  # 高优先级路径前缀
+    ADMISSION_LOW_PRIORITY_PATHS: List[str] = [  # 低优先级的重量级GET路径
+        "/api/users", "/api/menus", "/api/menus/tree", "/api/slow-queries", "/api/profiling/profiles"
+    ]
+
+    # 批量请求配置
+    BATCH_MAX_REQUESTS: int = 20  # 单个批量请求最多包含的子请求数
+    BATCH_MAX_CONCURRENCY: int = 8  # 并发执行的只读子请求数上限（不超过DB_POOL_SIZE的一半）
+
+    # 启动预热配置
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 5  # 预先建立的数据库连接数（不超过DB_POOL_SIZE）
+    WARMUP_REDIS_CONNECTIONS: int = 5  # 预先建立的Redis连接数
+    WARMUP_TIMEOUT: float = 30.0  # 预热最长时间（秒），超时后直接报告就绪
+
+    # 健康检查配置
+    HEALTH_CACHE_TTL: float = 2.0  # 数据库/Redis探测结果缓存时间（秒）
+    HEALTH_CHECK_TIMEOUT: float = 1.0  # 单项探测超时（秒）
+    HEALTH_POOL_SATURATION: float = 0.9  # 连接池使用率达到该比例时报告未就绪
+    HEALTH_REQUIRE_REDIS: bool = False  # Redis不可用时是否报告未就绪（默认降级运行）
+    HEALTH_DRAIN_SECONDS: float = 5.0  # 收到SIGTERM后先报告未就绪，等待该时间再开始关闭（0表示立即关闭）
+
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./app.db"
+    DB_POOL_SIZE: int = 10  # 连接池常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 连接池可额外创建的连接数
+    DB_POOL_TIMEOUT: float = 3.0  # 获取连接的最长等待时间（秒），超时返回503
+    SLOW_QUERY_THRESHOLD_MS: float = 200  # 慢查询阈值（毫秒），不大于0时关闭慢查询日志
+    SLOW_QUERY_MAX_STATEMENTS: int = 500  # 最多聚合的不同语句数
 
     # Redis配置
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 50  # 连接池最大连接数
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # 读写超时（秒）
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 0.3  # 连接超时（秒）
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # 空闲连接健康检查间隔（秒）
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = 5  # 连续失败多少次后熔断
+    REDIS_CIRCUIT_RECOVERY_TIMEOUT: float = 10.0  # 熔断后多久进入半开探测（秒）
+    REDIS_LOCAL_CACHE_SIZE: int = 1024  # 熔断期间本地LRU缓存容量
+    REDIS_LOCAL_CACHE_TTL: int = 60  # 本地LRU缓存条目有效期（秒）
+
+    # 服务进程配置（serve.py）
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # worker进程数，0表示按可用CPU数
+    SERVER_LOOP: str = "auto"  # auto / uvloop / asyncio，auto在安装了uvloop时使用uvloop
+    SERVER_HTTP: str = "auto"  # auto / httptools / h11，auto在安装了httptools时使用httptools
+    SERVER_BACKLOG: int = 2048  # 监听队列长度
+    SERVER_KEEPALIVE_TIMEOUT: int = 5  # 空闲keep-alive连接保持时间（秒）
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # 每个worker的最大连接数，超过时直接返回503
+    SERVER_LIMIT_MAX_REQUESTS: Optional[int] = None  # worker处理该数量请求后重启，None表示不重启
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # 关闭时等待进行中请求完成的最长时间（秒）
+    SERVER_ACCESS_LOG: bool = False  # 是否输出uvicorn访问日志（请求指标已由/metrics提供）
+
+    # 启动协调配置
+    STARTUP_LOCK_BACKEND: str = "file"  # file / redis / none
+    STARTUP_LOCK_FILE: str = "./.startup.lock"
+    STARTUP_LOCK_LEASE: int = 60  # Redis锁租约（秒）
+    STARTUP_READY_TTL: int = 60  # 就绪标记有效期（秒）
+    STARTUP_WAIT_TIMEOUT: float = 120.0  # 等待其他worker完成初始化的最长时间（秒）
 
     # 后台入口配置
     ADMIN_PREFIX: str = "/adm"
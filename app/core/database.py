@@ -1,23 +1,46 @@
-from sqlmodel import SQLModel, Session, create_engine
-from typing import Generator, Any
+from sqlmodel import Session, create_engine
+from typing import Generator, Any, Dict
 from contextlib import asynccontextmanager
+from fastapi import Request
+from .batch import BATCH_SESSION_SCOPE
 from .config import settings
+from .metrics import instrument_engine
+from .migrations import run_migrations
+from .slowlog import slow_query_log
+
+# 数据库引擎参数
+def _engine_options() -> Dict[str, Any]:
+    """引擎参数，内存SQLite使用单连接池，不支持连接池大小配置"""
+    options: Dict[str, Any] = {}
+    if settings.DATABASE_URL.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in settings.DATABASE_URL or settings.DATABASE_URL == "sqlite://":
+            return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT
+    )
+    return options
 
 # 创建数据库引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-)
+engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG, **_engine_options())
+instrument_engine(engine)
+if slow_query_log is not None:
+    slow_query_log.install(engine)
 
 # 创建所有表
 def create_db_and_tables():
-    """创建数据库和表"""
-    SQLModel.metadata.create_all(engine)
+    """创建数据库和表（结构指纹一致时跳过）"""
+    run_migrations(engine)
 
 # 获取数据库会话
-def get_session() -> Generator[Session, None, None]:
-    """获取数据库会话"""
+def get_session(request: Request) -> Generator[Session, None, None]:
+    """获取数据库会话（批量请求中按顺序执行的子请求共用批量请求的会话）"""
+    session = request.scope.get(BATCH_SESSION_SCOPE)
+    if session is not None:
+        yield session
+        return
     with Session(engine) as session:
         yield session
 
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, Dict, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from .admission import admission_controller
+from .config import settings
+from .database import engine
+from .redis import async_redis_client, redis_breaker, RedisUnavailableError
+from .singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+def _ping_database():
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+async def _timed(check) -> Dict[str, Any]:
+    """执行检查并记录耗时，超时或异常时返回失败原因"""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), settings.HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def pool_stats() -> Dict[str, Any]:
+    """数据库连接池使用情况（实时读取，无额外开销）"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"class": type(pool).__name__}
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "capacity": capacity,
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+class HealthChecker:
+    """健康检查
+
+    存活检查只表示进程可以响应；就绪检查包含数据库和Redis探测，探测结果缓存cache_ttl秒，
+    并发探测合并为一次，编排系统频繁探测不会给依赖增加负载。连接池和准入队列状态实时读取。
+    启动（含预热）完成前started为False，收到SIGTERM后draining为True，两种情况下就绪检查都返回未就绪。
+    """
+
+    def __init__(self, cache_ttl: float):
+        self.cache_ttl = cache_ttl
+        self.started = False
+        self.draining = False
+        self.warmup: Optional[Dict[str, Any]] = None
+        self._dependencies: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    async def dependencies(self) -> Dict[str, Any]:
+        """数据库和Redis探测结果（带缓存）"""
+        if self._dependencies is not None and time.monotonic() - self._checked_at < self.cache_ttl:
+            return self._dependencies
+        return await single_flight.do("health:dependencies", self._check_dependencies)
+
+    async def _check_dependencies(self) -> Dict[str, Any]:
+        async def ping_redis():
+            try:
+                await redis_breaker.call(lambda: async_redis_client.ping())
+            except RedisUnavailableError as e:
+                raise RuntimeError(str(e)) from e
+
+        database, redis = await asyncio.gather(
+            _timed(lambda: run_in_threadpool(_ping_database)),
+            _timed(ping_redis)
+        )
+        self._dependencies = {"database": database, "redis": redis}
+        self._checked_at = time.monotonic()
+        return self._dependencies
+
+    async def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """就绪状态及详情"""
+        dependencies = await self.dependencies()
+        pool = pool_stats()
+        breaker = redis_breaker.health()
+        admission = {
+            "active": admission_controller.active,
+            "queued": admission_controller.queued,
+            "max_concurrency": admission_controller.max_concurrency,
+            "max_queue": admission_controller.max_queue,
+        }
+
+        reasons = []
+        if not self.started:
+            reasons.append("starting")
+        if self.draining:
+            reasons.append("draining")
+        if not dependencies["database"]["ok"]:
+            reasons.append("database")
+        if settings.HEALTH_REQUIRE_REDIS and not dependencies["redis"]["ok"]:
+            reasons.append("redis")
+        if pool.get("utilization", 0.0) >= settings.HEALTH_POOL_SATURATION:
+            reasons.append("pool_saturated")
+        if settings.ADMISSION_ENABLED and admission_controller.queued >= admission_controller.max_queue:
+            reasons.append("queue_full")
+
+        ready = not reasons
+        # Redis不可用时由本地缓存降级，仍可提供服务
+        status = "ready" if ready and dependencies["redis"]["ok"] else ("degraded" if ready else "not_ready")
+        return ready, {
+            "status": status,
+            "reasons": reasons,
+            "checks": dependencies,
+            "pool": pool,
+            "redis_breaker": breaker,
+            "admission": admission,
+            "warmup": self.warmup,
+        }
+
+
+# 全局健康检查
+health_checker = HealthChecker(settings.HEALTH_CACHE_TTL)
+
+
+def install_drain_handler(delay: float):
+    """在服务器（uvicorn）的SIGTERM处理函数前插入排空阶段
+
+    uvicorn收到SIGTERM后立即停止监听并关闭空闲连接，之后才执行lifespan关闭，此时再报告未就绪已无意义。
+    这里先把就绪检查切换为未就绪，delay秒后再交给原处理函数开始关闭，期间照常处理请求，
+    负载均衡有时间发现实例未就绪并停止转发；排空期间再次收到SIGTERM时立即关闭。
+    只能在主线程中安装（如由TestClient在其他线程执行lifespan时跳过）。
+    """
+    if delay <= 0:
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle(sig, frame):
+        if health_checker.draining:
+            previous(sig, frame)
+            return
+        health_checker.draining = True
+        logger.info(f"收到SIGTERM，报告未就绪，{delay}秒后开始关闭")
+        loop.call_soon_threadsafe(loop.call_later, delay, previous, sig, None)
+
+    try:
+        signal.signal(signal.SIGTERM, handle)
+    except ValueError:
+        pass
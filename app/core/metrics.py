@@ -0,0 +1,205 @@
+import os
+import time
+import hmac
+import ipaddress
+import threading
+from typing import Any, Optional
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:  # 未安装时所有指标均为空操作
+    prometheus_client = None
+
+
+class _NoopMetric:
+    """prometheus_client未安装或指标关闭时的占位指标"""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+
+metrics_enabled = prometheus_client is not None and settings.METRICS_ENABLED
+
+# 数据库、Redis等内部调用的耗时分桶（秒）
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _metric(kind: str, name: str, documentation: str, labelnames=(), **kwargs: Any) -> Any:
+    """创建指标，未启用时返回空操作指标"""
+    if not metrics_enabled:
+        return _NoopMetric()
+    factory = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}[kind]
+    return factory(name, documentation, labelnames, **kwargs)
+
+
+# HTTP请求
+HTTP_REQUESTS = _metric("counter", "http_requests_total", "HTTP请求数", ("method", "route", "status"))
+HTTP_LATENCY = _metric("histogram", "http_request_duration_seconds", "HTTP请求耗时", ("method", "route"))
+HTTP_IN_FLIGHT = _metric("gauge", "http_requests_in_flight", "正在处理的HTTP请求数", multiprocess_mode="livesum")
+
+# 准入控制
+ADMISSION_ACTIVE = _metric("gauge", "admission_active_requests", "已获准处理的请求数", multiprocess_mode="livesum")
+ADMISSION_QUEUED = _metric("gauge", "admission_queued_requests", "等待准入的请求数", multiprocess_mode="livesum")
+REQUESTS_SHED = _metric("counter", "http_requests_shed_total", "因过载被拒绝的请求数", ("reason",))
+
+# 数据库连接池
+DB_POOL_CHECKOUT = _metric("histogram", "db_pool_checkout_seconds", "从连接池获取连接的等待时间", buckets=FAST_BUCKETS)
+DB_POOL_CONNECTIONS = _metric(
+    "gauge", "db_pool_connections", "连接池连接数（size为配置大小，checked_in为空闲连接，checked_out为使用中连接）",
+    ("state",), multiprocess_mode="livesum"
+)
+
+# Redis
+REDIS_LATENCY = _metric("histogram", "redis_call_duration_seconds", "Redis调用耗时", buckets=FAST_BUCKETS)
+REDIS_ERRORS = _metric("counter", "redis_call_errors_total", "Redis调用失败数（含熔断拒绝）", ("reason",))
+REDIS_BREAKER_STATE = _metric(
+    "gauge", "redis_circuit_state", "Redis熔断器状态（0关闭 1半开 2打开）", multiprocess_mode="livemax"
+)
+
+# 密码哈希
+PASSWORD_HASH_LATENCY = _metric(
+    "histogram", "password_hash_duration_seconds", "bcrypt哈希/校验耗时", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+)
+
+# 缓存命中
+CACHE_REQUESTS = _metric("counter", "cache_requests_total", "缓存读取次数", ("cache", "result"))
+
+
+def record_cache(cache: str, hit: bool):
+    """记录一次缓存读取结果，命中率 = hit / (hit + miss)"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine: Any):
+    """统计数据库连接池的获取等待时间和连接数"""
+    if not metrics_enabled:
+        return
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+
+    # 由连接池事件维护连接数（多进程模式下只能导出set/inc/dec写入的值，不能在抓取时读取连接池）
+    counts = {"open": 0, "checked_out": 0}
+    lock = threading.Lock()
+
+    def update(key: str, delta: int):
+        with lock:
+            counts[key] += delta
+            DB_POOL_CONNECTIONS.labels("checked_out").set(counts["checked_out"])
+            DB_POOL_CONNECTIONS.labels("checked_in").set(max(0, counts["open"] - counts["checked_out"]))
+
+    for name, key, delta in (
+        ("connect", "open", 1), ("close", "open", -1), ("detach", "open", -1),
+        ("checkout", "checked_out", 1), ("checkin", "checked_out", -1),
+    ):
+        event.listen(pool, name, lambda *args, key=key, delta=delta: update(key, delta))
+
+    # SingletonThreadPool等连接池没有固定大小
+    if hasattr(pool, "size"):
+        DB_POOL_CONNECTIONS.labels("size").set(pool.size())
+
+
+def instrument_breaker(breaker: Any):
+    """导出Redis熔断器状态（状态变化时更新）"""
+    if metrics_enabled:
+        breaker.on_state_change = lambda state: REDIS_BREAKER_STATE.set(breaker.STATE_VALUES[state])
+        breaker.on_state_change(breaker.state)
+
+
+def mark_process_dead():
+    """多进程模式下worker退出时清理其livesum等仪表数据，避免已退出worker的数值继续计入汇总"""
+    if metrics_enabled and "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def metrics_authorized(request: Request) -> bool:
+    """是否允许抓取指标
+
+    配置了METRICS_AUTH_TOKEN时要求 Authorization: Bearer <token>；未配置时只允许本机访问。
+    """
+    if settings.METRICS_AUTH_TOKEN:
+        expected = f"Bearer {settings.METRICS_AUTH_TOKEN}"
+        return hmac.compare_digest(request.headers.get("authorization", ""), expected)
+    if request.client is None:
+        return False
+    try:
+        return ipaddress.ip_address(request.client.host).is_loopback
+    except ValueError:
+        return False
+
+
+def metrics_response() -> Response:
+    """生成Prometheus抓取结果，多进程部署时汇总所有worker"""
+    if not metrics_enabled:
+        return Response("metrics disabled\n", status_code=404, media_type="text/plain")
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """记录每个路由的请求耗时、状态码和在途请求数
+
+    路由标签使用路由模板（如 /api/users/{user_id}），未匹配路由的请求统一记为 unmatched，
+    避免标签基数随URL增长。
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: Optional[list] = None):
+        self.app = app
+        self.excluded_paths = set(excluded_paths or ["/metrics"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
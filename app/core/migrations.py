@@ -0,0 +1,152 @@
+import hashlib
+import logging
+from typing import Callable, List
+from sqlalchemy import Column, Integer, MetaData, String, Table, BigInteger, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import SQLModel
+from app.utils.timezone import utc_timestamp
+import app.models  # noqa: F401  确保所有表都已注册到元数据
+
+logger = logging.getLogger(__name__)
+
+# 版本表不属于业务元数据，不参与指纹计算
+_version_metadata = MetaData()
+schema_version_table = Table(
+    "schema_version",
+    _version_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("fingerprint", String(64), nullable=False),
+    Column("applied_at", BigInteger, nullable=False),
+)
+
+
+def _index_names(conn: Connection, table: str) -> set:
+    """表上已有的索引名"""
+    return {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+# 已从模型中移除、但仍被已发布迁移步骤引用的索引定义（索引名 -> 列）
+_RETIRED_INDEXES = {
+    "ix_user_roles_role_id": ("role_id",),
+    "ix_role_permissions_permission_id": ("permission_id",),
+}
+
+
+def _create_index(conn: Connection, table: str, name: str, *columns: str) -> None:
+    """创建索引（已存在则跳过），未指定列时按模型中的定义创建，模型中已移除的按_RETIRED_INDEXES创建"""
+    if name in _index_names(conn, table):
+        return
+    if not columns:
+        index = next((i for i in SQLModel.metadata.tables[table].indexes if i.name == name), None)
+        if index is not None:
+            index.create(conn)
+            return
+        columns = _RETIRED_INDEXES[name]
+    conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+
+
+def _drop_index(conn: Connection, table: str, name: str) -> None:
+    """删除索引（不存在则跳过）"""
+    if name in _index_names(conn, table):
+        on_table = f" ON {table}" if conn.dialect.name in ("mysql", "mariadb") else ""
+        conn.execute(text(f"DROP INDEX {name}{on_table}"))
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """添加列（已存在则跳过）"""
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _m001_link_reverse_indexes(conn: Connection) -> None:
+    """关联表反向查询索引"""
+    _create_index(conn, "user_roles", "ix_user_roles_role_id")
+    _create_index(conn, "role_permissions", "ix_role_permissions_permission_id")
+
+
+def _m002_menu_permission_id(conn: Connection) -> None:
+    """菜单关联权限列"""
+    _add_column(conn, "menus", "permission_id", "INTEGER REFERENCES permissions(id)")
+
+
+def _m003_covering_indexes(conn: Connection) -> None:
+    """关联表覆盖索引与菜单子节点排序索引"""
+    _drop_index(conn, "user_roles", "ix_user_roles_role_id")
+    _drop_index(conn, "role_permissions", "ix_role_permissions_permission_id")
+    _drop_index(conn, "menus", "ix_menus_parent_id")
+    _create_index(conn, "user_roles", "ix_user_roles_role_id_user_id", "role_id", "user_id")
+    _create_index(conn, "role_permissions", "ix_role_permissions_permission_id_role_id", "permission_id", "role_id")
+    _create_index(conn, "menus", "ix_menus_parent_id_sort_order", "parent_id", "sort_order")
+
+
+# 有序迁移步骤，只能追加，不能修改已发布的步骤
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _m001_link_reverse_indexes,
+    _m002_menu_permission_id,
+    _m003_covering_indexes,
+]
+
+
+def schema_fingerprint(engine: Engine) -> str:
+    """根据模型元数据生成的DDL计算结构指纹，不访问数据库"""
+    digest = hashlib.sha256(str(len(MIGRATIONS)).encode())
+    for table in sorted(SQLModel.metadata.tables.values(), key=lambda t: t.name):
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+
+def run_migrations(engine: Engine) -> bool:
+    """执行数据库迁移
+
+    结构指纹与数据库记录一致时只需一次查询即可跳过；否则创建缺失的表，
+    依次执行尚未应用的迁移步骤，并记录新的版本和指纹。新建数据库直接按模型建表，
+    所有迁移视为已应用。
+
+    Returns:
+        是否执行了迁移
+    """
+    fingerprint = schema_fingerprint(engine)
+    version_query = (
+        select(schema_version_table.c.version, schema_version_table.c.fingerprint)
+        .where(schema_version_table.c.id == 1)
+    )
+
+    # 快速路径：只读一行版本记录，不做任何表结构反射
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(version_query).first()
+    except SQLAlchemyError:
+        row = None
+    if row is not None and row.fingerprint == fingerprint:
+        return False
+
+    with engine.begin() as conn:
+        _version_metadata.create_all(conn)
+        row = conn.execute(version_query).first()
+
+        if row is not None:
+            current = row.version
+        else:
+            # 没有版本记录：空库视为最新版本，已有业务表的旧库从头执行迁移
+            existing = set(inspect(conn).get_table_names()) & set(SQLModel.metadata.tables)
+            current = 0 if existing else len(MIGRATIONS)
+
+        SQLModel.metadata.create_all(conn)
+
+        for version, step in enumerate(MIGRATIONS[current:], start=current + 1):
+            logger.info(f"执行数据库迁移 {version}: {step.__doc__}")
+            step(conn)
+
+        values = {"version": len(MIGRATIONS), "fingerprint": fingerprint, "applied_at": utc_timestamp()}
+        if row is None:
+            conn.execute(schema_version_table.insert().values(id=1, **values))
+        else:
+            conn.execute(schema_version_table.update().where(schema_version_table.c.id == 1).values(**values))
+
+    logger.info(f"数据库结构已更新到版本 {len(MIGRATIONS)}")
+    return True
@@ -0,0 +1,286 @@
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+from .redis import async_redis_client, redis_breaker, RedisCache, RedisUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# 触发性能分析的请求头，值为 "{过期时间戳}.{签名}"
+PROFILE_HEADER = "X-Profile"
+# 响应中返回的分析结果ID
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# 缓存键
+PROFILE_KEY = "profile:{}"
+PROFILE_INDEX_KEY = "profile:index"
+PROFILE_TOGGLE_KEY = "profile:toggle"
+
+# 叶子帧为这些函数的调用栈视为空闲线程，不计入采样
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+MAX_STACK_DEPTH = 128
+
+
+def sign_profile_header(ttl: int) -> str:
+    """生成有效期为ttl秒的性能分析请求头"""
+    expires = int(time.time()) + ttl
+    signature = hmac.new(settings.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_header(value: str) -> bool:
+    """校验性能分析请求头的签名和有效期"""
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(settings.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class SamplingProfiler:
+    """采样分析器
+
+    后台线程按固定间隔通过sys._current_frames()采样所有线程（包括事件循环和线程池）的调用栈，
+    按折叠格式（root;...;leaf）累计出现次数。事件循环中并发执行的其他请求也会被采到。
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._collapse(frame)
+                if stack:
+                    self.stacks[stack] += 1
+
+    @staticmethod
+    def _collapse(frame: Any) -> Optional[str]:
+        """将调用栈折叠为 "root;...;leaf"，空闲线程返回None"""
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        names: List[str] = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class ProfileStore:
+    """性能分析结果存储（Redis，按保留时间过期）"""
+
+    @staticmethod
+    async def save(profile: Dict[str, Any]):
+        """保存分析结果并写入索引"""
+        await RedisCache.set(PROFILE_KEY.format(profile["id"]), json.dumps(profile), settings.PROFILING_RETENTION)
+        now = time.time()
+        try:
+            await redis_breaker.call(lambda: _save_index(profile["id"], now))
+        except RedisUnavailableError:
+            logger.warning(f"性能分析结果 {profile['id']} 未写入索引")
+
+    @staticmethod
+    async def get(profile_id: str) -> Optional[Dict[str, Any]]:
+        """读取分析结果"""
+        data = await RedisCache.get(PROFILE_KEY.format(profile_id))
+        return json.loads(data) if data is not None else None
+
+    @staticmethod
+    async def list(limit: int = 50) -> List[Dict[str, Any]]:
+        """列出最近的分析结果（不含调用栈）"""
+        ids = await redis_breaker.call(lambda: async_redis_client.zrevrange(PROFILE_INDEX_KEY, 0, limit - 1))
+        result = []
+        for profile_id in ids:
+            profile = await ProfileStore.get(profile_id)
+            if profile is not None:
+                profile.pop("stacks")
+                result.append(profile)
+        return result
+
+
+async def _save_index(profile_id: str, now: float):
+    """写入索引并清理过期条目"""
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        pipe.zadd(PROFILE_INDEX_KEY, {profile_id: now})
+        pipe.zremrangebyscore(PROFILE_INDEX_KEY, 0, now - settings.PROFILING_RETENTION)
+        pipe.expire(PROFILE_INDEX_KEY, settings.PROFILING_RETENTION)
+        await pipe.execute()
+
+
+class ProfileToggle:
+    """按路径前缀开启性能分析的临时开关，保存在Redis中供所有worker读取"""
+
+    def __init__(self, refresh_interval: float = 1.0):
+        self.refresh_interval = refresh_interval
+        self._prefix: Optional[str] = None
+        self._checked_at = 0.0
+
+    async def enable(self, path_prefix: str, duration: int):
+        await redis_breaker.call(lambda: async_redis_client.set(PROFILE_TOGGLE_KEY, path_prefix, ex=duration))
+        self._checked_at = 0.0
+
+    async def disable(self):
+        await redis_breaker.call(lambda: async_redis_client.delete(PROFILE_TOGGLE_KEY))
+        self._checked_at = 0.0
+
+    async def matches(self, path: str) -> bool:
+        """路径是否命中开关，开关状态每refresh_interval秒从Redis刷新一次"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.refresh_interval:
+            self._checked_at = now
+            try:
+                self._prefix = await redis_breaker.call(lambda: async_redis_client.get(PROFILE_TOGGLE_KEY))
+            except RedisUnavailableError:
+                self._prefix = None
+        return self._prefix is not None and path.startswith(self._prefix)
+
+
+def to_collapsed(profile: Dict[str, Any]) -> str:
+    """转换为折叠调用栈文本（flamegraph.pl / speedscope / inferno 均可导入）"""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+def to_speedscope(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """转换为speedscope的sampled格式"""
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[str, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    for stack, count in profile["stacks"].items():
+        indices = []
+        for name in stack.split(";"):
+            if name not in frame_index:
+                func, _, location = name.partition(" (")
+                file, _, line = location.rstrip(")").rpartition(":")
+                frame_index[name] = len(frames)
+                frame = {"name": func, "file": file}
+                if line.isdigit():
+                    frame["line"] = int(line)
+                frames.append(frame)
+            indices.append(frame_index[name])
+        samples.append(indices)
+        weights.append(count * profile["interval"])
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{profile['method']} {profile['path']}",
+        "exporter": settings.APP_NAME,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": f"{profile['method']} {profile['path']}",
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": profile["duration"],
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+class ProfilingMiddleware:
+    """按需性能分析中间件
+
+    请求带有有效签名的X-Profile头，或路径命中Redis中的临时开关时，
+    在采样分析器下执行该请求，结果保存后通过X-Profile-Id响应头返回ID。
+    同一进程同一时刻只分析一个请求。仅在PROFILING_ENABLED时安装，关闭时没有任何开销。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.toggle = profile_toggle
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        # 在等待开关查询（Redis）之前占用名额，避免并发请求同时通过检查、启动重叠的分析器
+        self._busy = True
+        try:
+            selected = await self._should_profile(scope)
+        except BaseException:
+            self._busy = False
+            raise
+        if not selected:
+            self._busy = False
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:16]
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        profiler = SamplingProfiler(settings.PROFILING_INTERVAL)
+        started_at = time.time()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            self._busy = False
+            duration = time.perf_counter() - start
+            await ProfileStore.save({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "started_at": started_at,
+                "duration": duration,
+                "interval": settings.PROFILING_INTERVAL,
+                "samples": profiler.samples,
+                "stacks": dict(profiler.stacks),
+            })
+            logger.info(f"已保存性能分析 {profile_id}: {scope['method']} {scope['path']} {duration:.3f}s")
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return verify_profile_header(value.decode("latin-1"))
+        return await self.toggle.matches(scope["path"])
+
+
+# 全局性能分析开关
+profile_toggle = ProfileToggle()
@@ -0,0 +1,148 @@
+import time
+import ipaddress
+from uuid import uuid4
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from starlette.requests import Request
+from .config import settings
+from .redis import async_redis_client, redis_breaker, RedisUnavailableError
+
+# 滑动窗口限流脚本
+# KEYS: 各限流维度的键；ARGV: 当前时间(毫秒)、窗口(毫秒)、本次请求标识、各键对应的上限
+# 所有键都未超限时才记录本次请求，返回 {是否放行, 需等待毫秒数}
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local member = ARGV[3]
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[3 + i]) then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+if retry_after > 0 then
+    return {0, retry_after}
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, window)
+end
+return {1, 0}
+"""
+
+_sliding_window = async_redis_client.register_script(SLIDING_WINDOW_LUA)
+
+# 受信任的反向代理
+_trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def client_ip(request: Request) -> str:
+    """客户端IP
+
+    直连地址属于TRUSTED_PROXIES时，从X-Forwarded-For由右向左跳过受信任代理，取第一个不受信任的地址；
+    客户端可以伪造该请求头的左侧部分，因此不直接取最左边的地址。
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _trusted_proxies or not _trusted(host):
+        return host
+    forwarded = [item.strip() for item in request.headers.get("x-forwarded-for", "").split(",") if item.strip()]
+    for address in reversed(forwarded):
+        if not _trusted(address):
+            return address
+    return forwarded[0] if forwarded else host
+
+
+class SlidingWindowLimiter:
+    """基于Redis有序集合的滑动窗口限流器
+
+    多个维度（如用户名和IP）在一次Lua脚本调用中原子地检查和记录。
+    Redis不可用时退化为进程内滑动窗口。
+    """
+
+    def __init__(self, prefix: str, window: int):
+        """
+        Args:
+            prefix: 键前缀
+            window: 窗口长度（秒）
+        """
+        self.prefix = prefix
+        self.window_ms = window * 1000
+        self._local: Dict[str, Deque[Tuple[int, str]]] = {}
+
+    async def hit(self, limits: List[Tuple[str, int]], member: Optional[str] = None) -> Tuple[bool, int]:
+        """记录一次请求
+
+        Args:
+            limits: (维度键, 窗口内上限) 列表
+            member: 本次请求的标识，之后可通过forget撤销这次记录（默认随机生成）
+
+        Returns:
+            (是否放行, 需等待的秒数)
+        """
+        now = int(time.time() * 1000)
+        member = member or uuid4().hex
+        keys = [f"{self.prefix}:{key}" for key, _ in limits]
+        args = [now, self.window_ms, member, *[limit for _, limit in limits]]
+        try:
+            allowed, retry_after = await redis_breaker.call(
+                lambda: _sliding_window(keys=keys, args=args)
+            )
+        except RedisUnavailableError:
+            allowed, retry_after = self._local_hit(keys, [limit for _, limit in limits], now, member)
+        return bool(allowed), -(-int(retry_after) // 1000)
+
+    def _local_hit(self, keys: List[str], limits: List[int], now: int, member: str) -> Tuple[int, int]:
+        """进程内滑动窗口（Redis降级时使用）"""
+        retry_after = 0
+        for key, limit in zip(keys, limits):
+            hits = self._local.setdefault(key, deque())
+            while hits and hits[0][0] <= now - self.window_ms:
+                hits.popleft()
+            if len(hits) >= limit:
+                retry_after = max(retry_after, hits[0][0] + self.window_ms - now)
+        if retry_after > 0:
+            return 0, retry_after
+        for key in keys:
+            self._local[key].append((now, member))
+        # 清理已过期的窗口，避免长期积累
+        if len(self._local) > settings.REDIS_LOCAL_CACHE_SIZE:
+            for key in [k for k, v in self._local.items() if not v or v[-1][0] <= now - self.window_ms]:
+                del self._local[key]
+        return 1, 0
+
+    async def forget(self, key: str, member: str):
+        """撤销某个维度上的一次记录（如登录成功后不计入IP的失败次数）"""
+        full_key = f"{self.prefix}:{key}"
+        hits = self._local.get(full_key)
+        if hits:
+            self._local[full_key] = deque(hit for hit in hits if hit[1] != member)
+        try:
+            await redis_breaker.call(lambda: async_redis_client.zrem(full_key, member))
+        except RedisUnavailableError:
+            pass
+
+    async def reset(self, key: str):
+        """清除某个维度的记录"""
+        full_key = f"{self.prefix}:{key}"
+        self._local.pop(full_key, None)
+        try:
+            await redis_breaker.call(lambda: async_redis_client.delete(full_key))
+        except RedisUnavailableError:
+            pass
+
+
+# 登录限流器
+login_limiter = SlidingWindowLimiter("ratelimit:login", settings.LOGIN_RATE_LIMIT_WINDOW)
@@ -1,5 +1,17 @@
+import asyncio
 import redis
+import redis.asyncio as aioredis
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
 from .config import settings
+from .metrics import REDIS_ERRORS, REDIS_LATENCY, instrument_breaker, record_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 # 创建Redis连接池
 redis_pool = redis.ConnectionPool(
@@ -7,34 +19,426 @@ redis_pool = redis.ConnectionPool(
     port=settings.REDIS_PORT,
     db=settings.REDIS_DB,
     password=settings.REDIS_PASSWORD,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
     decode_responses=True
 )
 
 # 创建Redis客户端
 redis_client = redis.Redis(connection_pool=redis_pool)
 
+# 创建异步Redis连接池（连接按需建立，由lifespan负责关闭）
+async_redis_pool = aioredis.ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    password=settings.REDIS_PASSWORD,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    decode_responses=True
+)
+
+# 创建异步Redis客户端，供async路由使用，避免阻塞事件循环
+async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+
+
+async def close_async_redis():
+    """关闭异步Redis客户端及连接池"""
+    await async_redis_client.aclose()
+    await async_redis_pool.disconnect()
+
+
+class RedisUnavailableError(Exception):
+    """Redis熔断或调用失败时抛出"""
+
+
+# Redis熔断器
+class CircuitBreaker:
+    """Redis熔断器
+
+    状态流转：closed --连续失败--> open --恢复超时--> half_open --探测成功--> closed
+    半开状态下只放行一个探测请求，探测失败则重新熔断。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # 状态对应的指标值，便于导出为gauge
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {"failures": 0, "rejected": 0, "opened": 0, "fallbacks": 0}
+        # 状态变化回调（如更新指标）
+        self.on_state_change: Optional[Callable[[str], None]] = None
+
+    def _set_state(self, state: str):
+        """切换状态（调用方持有锁）"""
+        if state != self._state:
+            self._state = state
+            if self.on_state_change is not None:
+                self.on_state_change(state)
+
+    @property
+    def state(self) -> str:
+        """当前状态（会根据恢复超时自动进入半开）"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._set_state(self.HALF_OPEN)
+            return self._state
+
+    def allow_request(self) -> bool:
+        """判断是否放行本次Redis调用"""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        """记录调用成功"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Redis熔断器已恢复")
+            self._set_state(self.CLOSED)
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """记录调用失败"""
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["opened"] += 1
+                    logger.warning(f"Redis熔断器打开，{self.recovery_timeout}秒后探测")
+                self._set_state(self.OPEN)
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def _release_probe(self):
+        """非Redis异常（如任务取消）时释放半开探测名额"""
+        with self._lock:
+            self._probing = False
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """通过熔断器执行异步Redis调用"""
+        if not self.allow_request():
+            REDIS_ERRORS.labels("rejected").inc()
+            raise RedisUnavailableError("Redis熔断中")
+        start = time.perf_counter()
+        try:
+            result = await func()
+        except redis.RedisError as e:
+            REDIS_ERRORS.labels("error").inc()
+            self.record_failure()
+            raise RedisUnavailableError(str(e)) from e
+        except BaseException:
+            self._release_probe()
+            raise
+        finally:
+            REDIS_LATENCY.observe(time.perf_counter() - start)
+        self.record_success()
+        return result
+
+    def call_sync(self, func: Callable[[], T]) -> T:
+        """通过熔断器执行同步Redis调用"""
+        if not self.allow_request():
+            REDIS_ERRORS.labels("rejected").inc()
+            raise RedisUnavailableError("Redis熔断中")
+        start = time.perf_counter()
+        try:
+            result = func()
+        except redis.RedisError as e:
+            REDIS_ERRORS.labels("error").inc()
+            self.record_failure()
+            raise RedisUnavailableError(str(e)) from e
+        except BaseException:
+            self._release_probe()
+            raise
+        finally:
+            REDIS_LATENCY.observe(time.perf_counter() - start)
+        self.record_success()
+        return result
+
+    def health(self) -> dict:
+        """熔断器健康信息"""
+        state = self.state
+        return {
+            "state": state,
+            "state_value": self.STATE_VALUES[state],
+            **self.stats
+        }
+
+
+# 进程内LRU缓存
+class LocalLRUCache:
+    """带过期时间的进程内LRU缓存，用于Redis不可用时降级读取"""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，过期则删除"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, expire: Optional[int] = None):
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        ttl = self.ttl if expire is None else min(expire, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str):
+        """删除缓存"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+
+# 全局熔断器与本地降级缓存
+redis_breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+    recovery_timeout=settings.REDIS_CIRCUIT_RECOVERY_TIMEOUT
+)
+local_cache = LocalLRUCache(
+    maxsize=settings.REDIS_LOCAL_CACHE_SIZE,
+    ttl=settings.REDIS_LOCAL_CACHE_TTL
+)
+instrument_breaker(redis_breaker)
+
+
+# 熔断期间未写入Redis的缓存改动
+class WriteJournal:
+    """熔断期间未写入Redis的缓存改动
+
+    每个键只保留最后一次改动（value为None表示删除），Redis恢复后按写入顺序回放。
+    回放完成前该键以本地LRU为准，避免读到Redis中的旧值（如熔断期间更新的版本号）。
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[int, Optional[str], Optional[int]]]" = OrderedDict()
+        self._sequence = 0
+        self._lock = asyncio.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def next_sequence(self) -> int:
+        """改动序号，用于判断并发改动的先后"""
+        self._sequence += 1
+        return self._sequence
+
+    def record(self, key: str, sequence: int, value: Optional[str], expire: Optional[int] = None):
+        """记录未写入Redis的改动，已有更新的改动时忽略"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > sequence:
+            return
+        self._entries[key] = (sequence, value, expire)
+        self._entries.move_to_end(key)
+
+    def discard(self, key: str, sequence: int):
+        """改动已直接写入Redis，移除不比它新的记录"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= sequence:
+            del self._entries[key]
+
+    async def replay(self) -> bool:
+        """按顺序回放改动，全部写入返回True，Redis仍不可用或其他协程正在回放时返回False"""
+        if self._lock.locked():
+            return False
+        async with self._lock:
+            while self._entries:
+                key, entry = next(iter(self._entries.items()))
+                _, value, expire = entry
+                if value is None:
+                    call = lambda: async_redis_client.delete(key)
+                else:
+                    call = lambda: async_redis_client.set(key, value, ex=expire)
+                try:
+                    await redis_breaker.call(call)
+                except RedisUnavailableError:
+                    return False
+                # 回放期间该键可能有更新的改动，保留到下一轮写入
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            logger.info("熔断期间的缓存改动已写入Redis")
+            return True
+
+
+# 全局改动日志
+write_journal = WriteJournal()
+
+
+# 缓存读写方法
+class RedisCache:
+    """带熔断和本地降级的异步缓存
+
+    Redis正常时读写Redis并同步到本地LRU；熔断期间读本地LRU，写操作更新本地并记入改动日志，
+    Redis恢复后先回放改动日志，再从Redis读取。
+    """
+
+    @staticmethod
+    async def get(key: str, local_fallback: bool = True) -> Optional[str]:
+        """读取缓存
+
+        local_fallback为False时只返回Redis中的值，Redis不可用或该键的改动尚未写入Redis时返回None。
+        """
+        # 改动日志未回放完成时，其中的键以本地为准
+        if write_journal:
+            await write_journal.replay()
+        try:
+            if key in write_journal:
+                raise RedisUnavailableError("改动尚未写入Redis")
+            value = await redis_breaker.call(lambda: async_redis_client.get(key))
+        except RedisUnavailableError:
+            redis_breaker.stats["fallbacks"] += 1
+            if not local_fallback:
+                return None
+            value = local_cache.get(key)
+            record_cache("local", value is not None)
+            return value
+        record_cache("redis", value is not None)
+        if value is not None:
+            local_cache.set(key, value)
+        return value
+
+    @staticmethod
+    async def set(key: str, value: str, expire: Optional[int] = None):
+        """写入缓存"""
+        local_cache.set(key, value, expire)
+        await RedisCache._write(key, value, expire)
+
+    @staticmethod
+    async def delete(*keys: str):
+        """删除缓存"""
+        local_cache.delete(*keys)
+        for key in keys:
+            await RedisCache._write(key, None)
+
+    @staticmethod
+    async def _write(key: str, value: Optional[str], expire: Optional[int] = None):
+        """写入Redis（value为None时删除），失败时记入改动日志"""
+        sequence = write_journal.next_sequence()
+        if write_journal:
+            # 先记录再回放，保证与日志中已有改动的先后顺序
+            write_journal.record(key, sequence, value, expire)
+            if not await write_journal.replay():
+                redis_breaker.stats["fallbacks"] += 1
+            return
+        if value is None:
+            call = lambda: async_redis_client.delete(key)
+        else:
+            call = lambda: async_redis_client.set(key, value, ex=expire)
+        try:
+            await redis_breaker.call(call)
+        except RedisUnavailableError:
+            redis_breaker.stats["fallbacks"] += 1
+            write_journal.record(key, sequence, value, expire)
+            return
+        write_journal.discard(key, sequence)
+
+
+def redis_health() -> dict:
+    """Redis熔断状态，用于健康检查和指标"""
+    return redis_breaker.health()
+
+
 # 会话存储相关方法
 class RedisSession:
-    """Redis会话管理类"""
+    """Redis会话管理类（经过熔断器，熔断或调用失败时抛出RedisUnavailableError）"""
 
     @staticmethod
     def set_session(session_id: str, data: dict, expire: int = 1800):
         """设置会话数据"""
-        redis_client.hmset(f"session:{session_id}", data)
-        redis_client.expire(f"session:{session_id}", expire)
+        def _set():
+            with redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(f"session:{session_id}", mapping=data)
+                pipe.expire(f"session:{session_id}", expire)
+                return pipe.execute()
+
+        redis_breaker.call_sync(_set)
 
     @staticmethod
     def get_session(session_id: str) -> dict:
         """获取会话数据"""
-        data = redis_client.hgetall(f"session:{session_id}")
-        return data
+        return redis_breaker.call_sync(lambda: redis_client.hgetall(f"session:{session_id}"))
 
     @staticmethod
     def delete_session(session_id: str):
         """删除会话数据"""
-        redis_client.delete(f"session:{session_id}")
+        redis_breaker.call_sync(lambda: redis_client.delete(f"session:{session_id}"))
 
     @staticmethod
     def update_session_expire(session_id: str, expire: int = 1800):
         """更新会话过期时间"""
-        redis_client.expire(f"session:{session_id}", expire)
\ No newline at end of file
+        redis_breaker.call_sync(lambda: redis_client.expire(f"session:{session_id}", expire))
+
+
+class AsyncRedisSession:
+    """异步Redis会话管理类（经过熔断器，熔断或调用失败时抛出RedisUnavailableError）"""
+
+    @staticmethod
+    async def set_session(session_id: str, data: dict, expire: int = 1800):
+        """设置会话数据"""
+        # 使用pipeline将写入与过期合并为一次往返
+        async def _set():
+            async with async_redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(f"session:{session_id}", mapping=data)
+                pipe.expire(f"session:{session_id}", expire)
+                return await pipe.execute()
+
+        await redis_breaker.call(_set)
+
+    @staticmethod
+    async def get_session(session_id: str) -> dict:
+        """获取会话数据"""
+        return await redis_breaker.call(lambda: async_redis_client.hgetall(f"session:{session_id}"))
+
+    @staticmethod
+    async def delete_session(session_id: str):
+        """删除会话数据"""
+        await redis_breaker.call(lambda: async_redis_client.delete(f"session:{session_id}"))
+
+    @staticmethod
+    async def update_session_expire(session_id: str, expire: int = 1800):
+        """更新会话过期时间"""
+        await redis_breaker.call(lambda: async_redis_client.expire(f"session:{session_id}", expire))
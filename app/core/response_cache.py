@@ -0,0 +1,86 @@
+import hashlib
+from typing import Any, Callable, Dict, Optional
+from fastapi import Depends, Request, Response
+from .auth import claims_permissions_key, get_current_active_user, get_token_claims, get_rbac_version
+from .config import settings
+from .metrics import record_cache
+from .redis import RedisCache
+from .serialization import JSONBytesResponse
+from .versions import VersionStamp, menu_version, user_version
+from app.models.rbac import User
+
+# 缓存标签及其版本号，服务层写操作更新版本号即可使带该标签的缓存全部失效
+TAG_VERSIONS: Dict[str, VersionStamp] = {
+    "menus": menu_version,
+    "users": user_version,
+}
+
+# 缓存状态响应头
+CACHE_STATUS_HEADER = "X-Cache"
+
+
+async def permission_fingerprint(user: User, claims: Optional[Dict[str, Any]]) -> str:
+    """调用者权限指纹，权限相同的用户共享缓存"""
+    if user.is_superuser:
+        return "su"
+    if claims is not None:
+        return f"p:{claims_permissions_key(claims)}"
+    return f"u:{user.id}:{await get_rbac_version()}"
+
+
+class ResponseCache:
+    """已认证GET接口的响应缓存
+
+    缓存键由路由、查询参数、调用者权限指纹和各标签版本号组成。
+    使用方式：
+    ```
+    cache: ResponseCache = Depends(ResponseCache.tagged("menus"))
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+    ...
+    return await cache.store(response)
+    ```
+    """
+
+    def __init__(self, key: Optional[str]):
+        self.key = key
+
+    @staticmethod
+    def tagged(*tags: str) -> Callable:
+        """生成带标签的缓存依赖"""
+        async def dependency(
+            request: Request,
+            current_user: User = Depends(get_current_active_user),
+            claims: Optional[Dict[str, Any]] = Depends(get_token_claims)
+        ) -> "ResponseCache":
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return ResponseCache(None)
+
+            versions = [await TAG_VERSIONS[tag].current() for tag in tags]
+            query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+            parts = [request.url.path, query, await permission_fingerprint(current_user, claims), *versions]
+            digest = hashlib.sha1("\n".join(parts).encode()).hexdigest()
+            return ResponseCache(f"http:{digest}")
+
+        return dependency
+
+    async def get(self) -> Optional[Response]:
+        """读取缓存的响应，未命中时返回None"""
+        if self.key is None:
+            return None
+        cached = await RedisCache.get(self.key)
+        record_cache("response", cached is not None)
+        if cached is None:
+            return None
+        return JSONBytesResponse(cached.encode(), headers={CACHE_STATUS_HEADER: "HIT"})
+
+    async def store(self, response: Response) -> Response:
+        """缓存成功的响应"""
+        if self.key is None:
+            response.headers[CACHE_STATUS_HEADER] = "BYPASS"
+            return response
+        if response.status_code == 200:
+            await RedisCache.set(self.key, response.body.decode(), settings.RESPONSE_CACHE_TTL)
+        response.headers[CACHE_STATUS_HEADER] = "MISS"
+        return response
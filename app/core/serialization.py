@@ -0,0 +1,48 @@
+import json
+from typing import Any, List, Sequence
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from .config import settings
+from app.models.rbac import UserRead
+from app.models.menu import MenuRead
+
+try:
+    import orjson
+except ImportError:  # 未安装时退回标准库
+    orjson = None
+
+
+def json_dumps(obj: Any) -> bytes:
+    """序列化为JSON字节串，优先使用orjson"""
+    if orjson is not None and settings.FAST_JSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """高性能JSON响应（orjson可用且启用FAST_JSON时使用orjson编码）"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+class JSONBytesResponse(Response):
+    """已序列化的JSON响应，直接返回字节串，不再编码"""
+    media_type = "application/json"
+
+
+# 预编译的列表序列化器，跳过FastAPI按response_model逐项校验
+user_list_adapter = TypeAdapter(List[UserRead])
+menu_list_adapter = TypeAdapter(List[MenuRead])
+user_adapter = TypeAdapter(UserRead)
+menu_adapter = TypeAdapter(MenuRead)
+
+
+def serialize_list(adapter: TypeAdapter, items: Sequence[Any]) -> bytes:
+    """通过预编译的TypeAdapter将ORM对象列表序列化为JSON字节串"""
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def serialize_model(adapter: TypeAdapter, item: Any) -> bytes:
+    """通过预编译的TypeAdapter将单个ORM对象序列化为JSON字节串"""
+    return adapter.dump_json(adapter.validate_python(item, from_attributes=True))
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from uuid import uuid4
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from .config import settings
+from .redis import async_redis_client, redis_breaker, RedisUnavailableError
+
+T = TypeVar("T")
+
+# 持有者校验后释放锁
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_lock = async_redis_client.register_script(RELEASE_LOCK_LUA)
+
+
+class SingleFlight:
+    """请求合并
+
+    同一进程内相同key的并发调用只执行一次，其余调用等待并共享结果（或异常）。
+    计算在独立的任务中执行，任一调用方被取消（如客户端断开）只影响它自己，不会取消计算或波及其他调用方。
+    结果由所有调用方共享，fn应返回不可变或与会话无关的数据（如普通字典），而不是绑定某个数据库会话的ORM对象。
+    提供recheck时还会通过Redis锁跨进程合并：拿到锁的进程负责计算，
+    其余进程轮询recheck（通常是读缓存）直到结果可用。
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None
+    ) -> T:
+        """执行fn，相同key的并发调用共享同一次执行"""
+        task = self._calls.get(key)
+        if task is None:
+            if recheck is not None and settings.SINGLE_FLIGHT_DISTRIBUTED:
+                task = asyncio.ensure_future(self._distributed(key, fn, recheck))
+            else:
+                task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 所有调用方都已取消时避免“异常未被获取”的警告
+        if not task.cancelled():
+            task.exception()
+
+    async def _distributed(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        recheck: Callable[[], Awaitable[Optional[T]]]
+    ) -> T:
+        """通过Redis锁跨进程合并，Redis不可用时直接计算"""
+        lock_key = f"singleflight:{key}"
+        token = uuid4().hex
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+
+        while True:
+            try:
+                acquired = await redis_breaker.call(
+                    lambda: async_redis_client.set(lock_key, token, nx=True, ex=settings.SINGLE_FLIGHT_LOCK_TTL)
+                )
+            except RedisUnavailableError:
+                return await fn()
+
+            if acquired:
+                try:
+                    return await fn()
+                finally:
+                    try:
+                        # 只释放自己持有的锁（计算超过TTL时锁可能已被其他进程取得）
+                        await redis_breaker.call(lambda: _release_lock(keys=[lock_key], args=[token]))
+                    except RedisUnavailableError:
+                        pass  # 锁会在TTL后自动过期
+
+            await asyncio.sleep(0.05)
+            result = await recheck()
+            if result is not None:
+                return result
+            if time.monotonic() > deadline:
+                return await fn()
+
+
+# 全局请求合并器
+single_flight = SingleFlight()
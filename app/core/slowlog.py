@@ -0,0 +1,145 @@
+import re
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# SQL归一化规则：字面量和占位符统一为 ?，IN列表折叠，空白压缩
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# 查找调用方时跳过的模块
+_SKIP_MODULES = ("sqlalchemy", "sqlmodel", "app.core.database", "app.core.slowlog", "app.core.metrics")
+
+
+def normalize_sql(statement: str) -> str:
+    """归一化SQL，参数不同的同类语句得到相同结果"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """参数形状（类型和数量），不记录参数值"""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)}x{parameter_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+def find_caller() -> str:
+    """沿调用栈查找发起查询的应用代码，优先返回服务层方法（如 MenuService._get_user_children）"""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and not module.startswith(_SKIP_MODULES):
+            label = frame.f_code.co_qualname
+            if module.startswith("app.services."):
+                return label
+            if fallback is None:
+                fallback = f"{module}:{label}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class SlowQueryLog:
+    """慢查询日志
+
+    通过引擎事件统计每条语句的执行耗时，超过阈值时记录日志（归一化SQL、参数形状、调用方），
+    并按归一化语句聚合次数和耗时。统计保存在进程内，多worker部署时各worker分别统计。
+    """
+
+    def __init__(self, threshold_ms: float, max_statements: int):
+        self.threshold = threshold_ms / 1000
+        self.max_statements = max_statements
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine):
+        """注册引擎事件"""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        # 开始时间记录在本次执行的上下文上：执行失败时不会触发after事件，
+        # 记录在连接上会残留到连接池中的连接，使之后的计时对应到错误的语句
+        if context is not None:
+            context._slowlog_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_slowlog_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed < self.threshold:
+            return
+
+        normalized = normalize_sql(statement)
+        caller = find_caller()
+        shape = parameter_shape(parameters, executemany)
+        logger.warning(f"慢查询 {elapsed * 1000:.1f}ms [{caller}] {normalized} 参数{shape}")
+        self.record(normalized, elapsed, caller, shape)
+
+    def record(self, normalized: str, elapsed: float, caller: str, shape: str):
+        """聚合一条慢查询"""
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                if len(self._stats) >= self.max_statements:
+                    return
+                stats = self._stats[normalized] = {
+                    "count": 0, "total": 0.0, "max": 0.0, "callers": Counter(), "shape": shape
+                }
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["callers"][caller] += 1
+            stats["shape"] = shape
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[Dict[str, Any]]:
+        """按总耗时、次数或最大耗时排序的慢查询统计"""
+        with self._lock:
+            items = [
+                {
+                    "statement": statement,
+                    "count": stats["count"],
+                    "total_ms": round(stats["total"] * 1000, 3),
+                    "mean_ms": round(stats["total"] / stats["count"] * 1000, 3),
+                    "max_ms": round(stats["max"] * 1000, 3),
+                    "parameters": stats["shape"],
+                    "callers": dict(stats["callers"].most_common(5)),
+                }
+                for statement, stats in self._stats.items()
+            ]
+        key = {"total": "total_ms", "count": "count", "max": "max_ms"}.get(order_by, "total_ms")
+        items.sort(key=lambda item: item[key], reverse=True)
+        return items[:limit]
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._stats.clear()
+
+
+# 全局慢查询日志（阈值不大于0时不启用）
+slow_query_log: Optional[SlowQueryLog] = (
+    SlowQueryLog(settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_MAX_STATEMENTS)
+    if settings.SLOW_QUERY_THRESHOLD_MS > 0 else None
+)
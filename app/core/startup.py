@@ -0,0 +1,97 @@
+import asyncio
+import time
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable
+from .config import settings
+from .redis import async_redis_client, redis_breaker, RedisUnavailableError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 缓存键
+STARTUP_LOCK_KEY = "startup:lock"
+STARTUP_READY_KEY = "startup:ready"
+
+StartupWork = Callable[[], Awaitable[None]]
+
+
+async def coordinate_startup(work: StartupWork, marker: str) -> None:
+    """多worker启动协调
+
+    同一时间只有一个worker执行建表和初始化数据，其余worker等待就绪标记后直接跳过。
+    就绪标记记录marker（结构和种子数据指纹），只有marker一致且在STARTUP_READY_TTL秒内时才跳过，
+    重新部署后结构或种子数据变化时即使在有效期内也会重新执行。
+    """
+    backend = settings.STARTUP_LOCK_BACKEND
+    if backend == "redis":
+        try:
+            await _redis_coordinated(work, marker)
+            return
+        except RedisUnavailableError as e:
+            logger.warning(f"Redis启动锁不可用，改用文件锁: {e}")
+            backend = "file"
+
+    if backend == "file" and fcntl is not None:
+        await _file_coordinated(work, marker)
+    else:
+        await work()
+
+
+async def _file_coordinated(work: StartupWork, marker: str) -> None:
+    """基于文件锁的启动协调（同一主机上的多个worker）"""
+    lock_path = Path(settings.STARTUP_LOCK_FILE)
+    ready_path = lock_path.with_suffix(".ready")
+
+    with open(lock_path, "a+") as fp:
+        # 在线程中阻塞等待锁，避免阻塞事件循环
+        await asyncio.to_thread(fcntl.flock, fp, fcntl.LOCK_EX)
+        try:
+            if (
+                ready_path.exists()
+                and time.time() - ready_path.stat().st_mtime < settings.STARTUP_READY_TTL
+                and ready_path.read_text() == marker
+            ):
+                logger.info("其他worker已完成启动初始化，跳过")
+                return
+
+            await work()
+            ready_path.write_text(marker)
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+async def _redis_coordinated(work: StartupWork, marker: str) -> None:
+    """基于Redis租约锁的启动协调（可跨主机）"""
+    deadline = time.monotonic() + settings.STARTUP_WAIT_TIMEOUT
+    lock = async_redis_client.lock(STARTUP_LOCK_KEY, timeout=settings.STARTUP_LOCK_LEASE)
+
+    while True:
+        if await redis_breaker.call(lambda: async_redis_client.get(STARTUP_READY_KEY)) == marker:
+            logger.info("其他worker已完成启动初始化，跳过")
+            return
+
+        if await redis_breaker.call(lambda: lock.acquire(blocking=False)):
+            try:
+                await work()
+                await redis_breaker.call(
+                    lambda: async_redis_client.set(STARTUP_READY_KEY, marker, ex=settings.STARTUP_READY_TTL)
+                )
+            finally:
+                try:
+                    await lock.release()
+                except Exception as e:
+                    # 租约已过期时锁可能已被释放
+                    logger.warning(f"释放启动锁失败: {e}")
+            return
+
+        # 其他worker持有锁：等待就绪标记；持有者异常退出时租约到期后重新竞争
+        if time.monotonic() > deadline:
+            logger.warning("等待启动初始化超时，由当前worker执行")
+            await work()
+            return
+        await asyncio.sleep(0.2)
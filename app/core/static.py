@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import logging
+from pathlib import Path
+from typing import Dict, List
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.types import Scope
+from .conditional import not_modified
+
+try:
+    import brotli
+except ImportError:  # 未安装时只提供gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 构建工具生成的带内容哈希的文件名，如 assets/index-BXa1c2d3.js
+HASHED_ASSET = re.compile(r"[/\\]assets[/\\].+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+# 带哈希的文件内容永不变化，可长期缓存
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# 预压缩文件后缀，按优先级排列
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+
+
+def accepted_encodings(headers: Headers) -> List[str]:
+    """解析Accept-Encoding，返回客户端接受的编码（忽略q=0）"""
+    encodings = []
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        if name:
+            encodings.append(name.lower())
+    return encodings
+
+
+class SPAShell:
+    """常驻内存的SPA入口页面，启动时加载并预先压缩"""
+
+    def __init__(self):
+        self.variants: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return "identity" in self.variants
+
+    def load(self, path: Path):
+        """加载入口页面，文件不存在时保持未加载状态"""
+        if not path.exists():
+            logger.warning(f"前端入口 {path} 不存在")
+            return
+
+        content = path.read_bytes()
+        self.variants = {"identity": content, "gzip": gzip.compress(content, 9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(content, quality=11)
+        # 各编码的字节内容不同，强ETag按编码区分
+        digest = hashlib.sha1(content).hexdigest()[:16]
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def response(self, request: Request) -> Response:
+        """按Accept-Encoding返回对应的压缩版本，ETag一致时返回304"""
+        accepted = accepted_encodings(request.headers)
+        encoding = next((e for e in ("br", "gzip") if e in accepted and e in self.variants), "identity")
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": REVALIDATE_CACHE,
+            "Vary": "Accept-Encoding"
+        }
+
+        response = not_modified(request, self.etags[encoding])
+        if response is not None:
+            response.headers.update(headers)
+            return response
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type="text/html", headers=headers)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """静态文件服务
+
+    - 客户端接受时优先返回构建时生成的 .br / .gz 预压缩文件
+    - 带内容哈希的文件设置 immutable 长期缓存，其余文件每次重新验证
+    """
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = str(full_path)
+        media_type = mimetypes.guess_type(path)[0] or "text/plain"
+
+        response = None
+        accepted = accepted_encodings(request_headers)
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            response = super().file_response(path + suffix, compressed_stat, scope, status_code)
+            if response.status_code != 304:
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Content-Type"] = media_type
+            break
+
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE if HASHED_ASSET.search(path) else REVALIDATE_CACHE
+        return response
+
+
+# 全局SPA入口
+spa_shell = SPAShell()
@@ -0,0 +1,166 @@
+import json
+import secrets
+import time
+import logging
+from typing import Optional, Dict, Any
+from .config import settings
+from .redis import async_redis_client, redis_breaker, local_cache, RedisUnavailableError
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+# 缓存键
+REFRESH_TOKEN_KEY = "refresh:{}"
+REVOKED_TOKEN_KEY = "revoked:{}"
+REVOKED_LOG_KEY = "revoked:log"
+
+
+# 访问令牌吊销列表
+class RevocationList:
+    """访问令牌吊销列表
+
+    吊销记录保存在Redis中（按jti的键 + 按吊销时间排序的日志），每个进程维护一个
+    从日志同步的布隆过滤器。未吊销的令牌（绝大多数请求）在本地即可判定，无需访问Redis；
+    只有布隆过滤器命中时才到Redis精确确认。
+    Redis不可用时的吊销记录保存在本进程的待写入列表中，重建布隆过滤器时保留，Redis恢复后补写。
+    """
+
+    def __init__(self):
+        self._filter = BloomFilter(settings.REVOCATION_BLOOM_CAPACITY)
+        self._synced_at = 0.0
+        self._rebuilt_at = 0.0
+        # 未能写入Redis的吊销记录：jti -> 令牌过期时间
+        self._pending: Dict[str, int] = {}
+
+    @property
+    def _window(self) -> int:
+        """吊销记录需要保留的时长（秒），即访问令牌的最长有效期"""
+        return settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    async def revoke(self, jti: str, expires_at: int):
+        """吊销访问令牌
+
+        Args:
+            jti: 令牌ID
+            expires_at: 令牌过期时间（秒级时间戳）
+        """
+        # 先在本进程生效，Redis不可用时至少保证当前进程拒绝该令牌
+        self._filter.add(jti)
+        local_cache.set(REVOKED_TOKEN_KEY.format(jti), "1", max(1, int(expires_at - time.time())))
+
+        try:
+            await self._write(jti, expires_at)
+        except RedisUnavailableError as e:
+            self._pending[jti] = expires_at
+            logger.warning(f"令牌吊销未能写入Redis，Redis恢复后补写: {e}")
+
+    async def _write(self, jti: str, expires_at: int):
+        """写入吊销记录和吊销日志"""
+        now = time.time()
+        key = REVOKED_TOKEN_KEY.format(jti)
+
+        async def _revoke():
+            async with async_redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(key, "1", ex=max(1, int(expires_at - now)))
+                pipe.zadd(REVOKED_LOG_KEY, {jti: now})
+                pipe.zremrangebyscore(REVOKED_LOG_KEY, "-inf", now - self._window)
+                return await pipe.execute()
+
+        await redis_breaker.call(_revoke)
+
+    async def _replay(self):
+        """补写待写入的吊销记录（日志按补写时间记录，其他进程的增量同步可以取到），已过期的直接丢弃"""
+        now = time.time()
+        for jti, expires_at in list(self._pending.items()):
+            if expires_at > now:
+                await self._write(jti, expires_at)
+            del self._pending[jti]
+
+    async def sync(self):
+        """按间隔从Redis增量同步吊销日志，超过令牌有效期时全量重建"""
+        now = time.time()
+        if now - self._synced_at < settings.REVOCATION_SYNC_INTERVAL:
+            return
+
+        previous = self._synced_at
+        self._synced_at = now
+        rebuild = now - self._rebuilt_at >= self._window
+        start = now - self._window if rebuild else previous - settings.REVOCATION_SYNC_INTERVAL
+
+        try:
+            if self._pending:
+                await self._replay()
+            jtis = await redis_breaker.call(
+                lambda: async_redis_client.zrangebyscore(REVOKED_LOG_KEY, start, "+inf")
+            )
+        except RedisUnavailableError:
+            self._synced_at = previous
+            return
+
+        if rebuild:
+            self._filter.clear()
+            self._rebuilt_at = now
+            # 保留尚未写入Redis的本地吊销记录
+            for jti in self._pending:
+                self._filter.add(jti)
+        for jti in jtis:
+            self._filter.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """判断访问令牌是否已被吊销"""
+        await self.sync()
+        if jti not in self._filter:
+            return False
+
+        key = REVOKED_TOKEN_KEY.format(jti)
+        if jti in self._pending or local_cache.get(key) is not None:
+            return True
+        try:
+            return bool(await redis_breaker.call(lambda: async_redis_client.exists(key)))
+        except RedisUnavailableError:
+            # 无法确认时按已吊销处理
+            return True
+
+
+# 刷新令牌存储
+class RefreshTokenStore:
+    """刷新令牌存储
+
+    刷新令牌为随机串，保存在Redis中，每次使用后立即作废并签发新令牌（轮换）。
+    """
+
+    @staticmethod
+    async def issue(user_id: int, username: str) -> Optional[str]:
+        """签发刷新令牌，Redis不可用时返回None"""
+        token = secrets.token_urlsafe(32)
+        data = json.dumps({"uid": user_id, "sub": username})
+        expire = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        try:
+            await redis_breaker.call(
+                lambda: async_redis_client.set(REFRESH_TOKEN_KEY.format(token), data, ex=expire)
+            )
+        except RedisUnavailableError as e:
+            logger.warning(f"刷新令牌签发失败: {e}")
+            return None
+        return token
+
+    @staticmethod
+    async def consume(token: str) -> Optional[Dict[str, Any]]:
+        """使用刷新令牌，令牌被原子地取出并删除，无效时返回None"""
+        data = await redis_breaker.call(
+            lambda: async_redis_client.getdel(REFRESH_TOKEN_KEY.format(token))
+        )
+        if data is None:
+            return None
+        return json.loads(data)
+
+    @staticmethod
+    async def revoke(token: str):
+        """吊销刷新令牌"""
+        await redis_breaker.call(
+            lambda: async_redis_client.delete(REFRESH_TOKEN_KEY.format(token))
+        )
+
+
+# 全局吊销列表
+revocation_list = RevocationList()
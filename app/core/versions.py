@@ -0,0 +1,40 @@
+from typing import Optional
+from uuid import uuid4
+from .redis import RedisCache
+
+
+class VersionStamp:
+    """数据版本号
+
+    保存在Redis中的随机短串，数据变化时更新。用于缓存键、令牌声明和ETag，
+    比较版本号即可判断依赖的数据是否变化，无需访问数据库。
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    async def get(self, authoritative: bool = False) -> Optional[str]:
+        """获取版本号，Redis不可用且本地无缓存时返回None
+
+        authoritative为True时只接受Redis中的版本号，Redis降级时返回None。
+        """
+        return await RedisCache.get(self.key, local_fallback=not authoritative)
+
+    async def bump(self) -> str:
+        """更新版本号"""
+        version = uuid4().hex[:8]
+        await RedisCache.set(self.key, version)
+        return version
+
+    async def current(self) -> str:
+        """获取版本号，不存在时生成一个"""
+        version = await self.get()
+        if version is None:
+            version = await self.bump()
+        return version
+
+
+# 全局版本号
+rbac_version = VersionStamp("rbac:version")  # 角色、权限关系及用户状态
+menu_version = VersionStamp("menu:version")  # 菜单
+user_version = VersionStamp("user:version")  # 用户列表
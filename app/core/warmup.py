@@ -0,0 +1,88 @@
+import asyncio
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from fastapi.concurrency import run_in_threadpool
+from jose import jwt
+from .auth import create_access_token, preload_permission_ids, verify_password, _dummy_password_hash
+from .config import settings
+from .database import engine, get_async_session
+from .redis import async_redis_client, redis_breaker
+from .tokens import revocation_list
+from .versions import menu_version, rbac_version, user_version
+
+logger = logging.getLogger(__name__)
+
+
+def _open_db_connections(count: int):
+    """同时打开count个连接后归还，使其常驻连接池"""
+    connections = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            conn.exec_driver_sql("SELECT 1")
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+async def _open_redis_connections(count: int):
+    """并发执行count个PING，使异步连接池建立相应数量的连接"""
+    await asyncio.gather(*(redis_breaker.call(lambda: async_redis_client.ping()) for _ in range(count)))
+
+
+async def _load_caches():
+    """加载版本号、菜单树、权限映射和吊销列表
+
+    预热与正常请求并行，数据库查询都在线程池中执行（菜单树由MenuService在线程池中构建）。
+    """
+    from app.services.menu import MenuService
+
+    for version in (rbac_version, menu_version, user_version):
+        await version.current()
+    await MenuService.get_menu_tree_json()
+    async with get_async_session() as db:
+        await preload_permission_ids(db)
+    await revocation_list.sync()
+
+
+def _exercise_crypto():
+    """预先执行一次JWT签发/解析和bcrypt校验，完成算法后端的导入和初始化"""
+    token = create_access_token({"sub": "warmup"})
+    jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    verify_password("warmup", _dummy_password_hash())
+
+
+async def _step(name: str, step: Callable[[], Awaitable[Any]], results: Dict[str, Any]):
+    """执行单个预热步骤，失败只记录不中断"""
+    start = time.perf_counter()
+    try:
+        await step()
+        results[name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 1)}
+    except Exception as e:
+        logger.warning(f"预热步骤 {name} 失败: {e}")
+        results[name] = {"ok": False, "error": str(e) or type(e).__name__}
+
+
+async def warm_up() -> Dict[str, Any]:
+    """启动预热
+
+    预先建立数据库和Redis连接、加载热点缓存、初始化JWT和bcrypt，避免部署后的首批请求承担这些开销。
+    各步骤互不依赖，任一步骤失败只记录警告。
+    """
+    start = time.perf_counter()
+    results: Dict[str, Any] = {}
+    db_connections = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+
+    await asyncio.gather(
+        _step("database", lambda: run_in_threadpool(_open_db_connections, db_connections), results),
+        _step("redis", lambda: _open_redis_connections(settings.WARMUP_REDIS_CONNECTIONS), results),
+        _step("crypto", lambda: run_in_threadpool(_exercise_crypto), results),
+    )
+    # 缓存加载依赖数据库和Redis连接，放在连接建立之后
+    await _step("caches", _load_caches, results)
+
+    results["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(f"预热完成: {results}")
+    return results
@@ -1,34 +1,86 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from pathlib import Path
+import asyncio
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import create_db_and_tables, engine, get_async_session
-from app.core.redis import redis_client
+from app.core.migrations import schema_fingerprint
+from app.core.startup import coordinate_startup
+from app.core.serialization import FastJSONResponse
+from app.core.static import PrecompressedStaticFiles, spa_shell
+from app.core.compression import CompressionMiddleware
+from app.core.admission import AdmissionMiddleware, admission_controller, pool_timeout_handler
+from app.core.metrics import MetricsMiddleware, mark_process_dead, metrics_authorized, metrics_enabled, metrics_response
+from app.core.profiling import ProfilingMiddleware
+from app.core.redis import redis_client, async_redis_client, close_async_redis, redis_health
 from app.api import api_router
-from app.scripts.init_data import init_data
+from app.api.health import router as health_router
+from app.core.health import health_checker, install_drain_handler
+from app.core.warmup import warm_up
+from app.scripts.init_data import init_data, seed_fingerprint
 import logging
 
 
 logger = logging.getLogger(__name__)
 
-# 生命周期管理
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """应用生命周期管理"""
-    # 启动时执行
+# 建表和初始化数据
+async def prepare_database():
+    """建表、执行迁移并初始化数据（均可重复执行）"""
     create_db_and_tables()
 
     # 初始化数据
     async with get_async_session() as db:
         await init_data(db)
 
+def startup_marker() -> str:
+    """启动就绪标记：结构指纹和种子数据指纹，任一变化时需要重新执行prepare_database"""
+    return f"{schema_fingerprint(engine)}:{seed_fingerprint()}"
+
+# 生命周期管理
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期管理"""
+    # 启动时执行（多worker时只由一个worker执行；由serve.py启动时已在主进程完成）
+    await coordinate_startup(prepare_database, startup_marker())
+
+    # 加载SPA入口页面到内存
+    spa_shell.load(Path("static/index.html"))
+
+    # 预检异步Redis连接池，Redis不可用时仅记录警告，不阻止启动
+    try:
+        await async_redis_client.ping()
+        logger.info("异步Redis连接池已就绪")
+    except Exception as e:
+        logger.warning(f"异步Redis连接失败: {e}")
+
+    # 后台预热，完成前就绪检查报告未就绪
+    async def warm():
+        try:
+            health_checker.warmup = await asyncio.wait_for(warm_up(), settings.WARMUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"预热超过{settings.WARMUP_TIMEOUT}秒，跳过剩余步骤")
+        health_checker.started = True
+
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(warm())
+    else:
+        health_checker.started = True
+
+    # 收到SIGTERM时先报告未就绪并继续服务HEALTH_DRAIN_SECONDS秒，再由uvicorn停止监听
+    install_drain_handler(settings.HEALTH_DRAIN_SECONDS)
+
     yield
 
-    # 关闭时执行
+    # 关闭时执行（uvicorn已停止接受新连接并等待进行中的请求完成）
+    health_checker.started = False
+    if warmup_task is not None:
+        # 线程池中的预热步骤无法中途取消，等待其结束（受WARMUP_TIMEOUT限制），避免退出时线程仍在运行
+        await warmup_task
     logger.info("应用程序正在关闭，执行清理操作...")
 
     # 关闭数据库连接池
@@ -41,16 +93,22 @@ async def lifespan(app: FastAPI):
     # 关闭Redis连接
     try:
         redis_client.close()
+        await close_async_redis()
         logger.info("Redis连接已关闭")
     except Exception as e:
         logger.error(f"关闭Redis连接时出错: {e}")
 
+    # 多进程指标模式下清理本worker的仪表数据（如因SERVER_LIMIT_MAX_REQUESTS重启的worker）
+    mark_process_dead()
+
 
 # 创建FastAPI应用
 app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
-    lifespan=lifespan
+    lifespan=lifespan,
+    # 启用FAST_JSON时默认响应类改用orjson编码，否则保持FastAPI默认
+    default_response_class=FastJSONResponse if settings.FAST_JSON else JSONResponse
 )
 
 # 配置CORS
@@ -62,25 +120,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 按需性能分析（未启用时不安装中间件）
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# 配置响应压缩
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+    )
+
+# 准入控制：超过并发上限的请求排队，队列满或等待超时时快速返回503
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        bypass_paths=settings.ADMISSION_BYPASS_PATHS,
+        high_priority_paths=settings.ADMISSION_HIGH_PRIORITY_PATHS,
+        low_priority_paths=settings.ADMISSION_LOW_PRIORITY_PATHS,
+    )
+
+# 数据库连接池获取超时返回503
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+
+# 配置请求指标（最外层，统计包含压缩在内的完整耗时）
+if metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # 挂载静态文件
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static", check_dir=False), name="static")
 
 # 注册路由
 app.include_router(api_router)
+app.include_router(health_router, tags=["健康检查"])
 
 # 前端入口路由
 @app.get("/")
 async def index():
     """前端入口"""
-    return {"message": "API服务运行正常", "status": "ok"}
+    return {"message": "API服务运行正常", "status": "ok", "redis": redis_health()}
+
+# Prometheus指标
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus指标抓取接口"""
+    if not metrics_authorized(request):
+        raise HTTPException(status_code=403, detail="无权访问指标")
+    return metrics_response()
 
 # SPA应用入口
 @app.get(f"{settings.ADMIN_PREFIX}{{path:path}}")
-async def serve_spa(path: str):
+async def serve_spa(path: str, request: Request):
     """提供SPA应用"""
-    # 返回index.html，由前端路由处理
-    index_path = Path("static/index.html")
-    if index_path.exists():
-        return FileResponse(index_path)
+    # 返回内存中的index.html，由前端路由处理
+    if spa_shell.loaded:
+        return spa_shell.response(request)
     else:
         raise HTTPException(status_code=404, detail="前端应用未构建")
\ No newline at end of file
@@ -4,10 +4,18 @@ from app.models.rbac import (
     Permission, RolePermission, PermissionCreate, PermissionUpdate, PermissionRead
 )
 from app.models.menu import Menu, MenuCreate, MenuUpdate, MenuRead
+from app.models.token import TokenRefresh, TokenRevoke
+from app.models.seed import SeedVersion
+from app.models.profiling import ProfileToggleCreate
+from app.models.batch import BatchRequestItem, BatchRequest
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserRead",
     "Role", "UserRole", "RoleCreate", "RoleUpdate", "RoleRead",
     "Permission", "RolePermission", "PermissionCreate", "PermissionUpdate", "PermissionRead",
-    "Menu", "MenuCreate", "MenuUpdate", "MenuRead"
+    "Menu", "MenuCreate", "MenuUpdate", "MenuRead",
+    "TokenRefresh", "TokenRevoke",
+    "SeedVersion",
+    "ProfileToggleCreate",
+    "BatchRequestItem", "BatchRequest"
 ]
@@ -0,0 +1,17 @@
+from sqlmodel import SQLModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class BatchRequestItem(SQLModel):
+    """批量请求中的单个子请求"""
+    id: Optional[str] = None  # 调用方指定的标识，原样返回
+    method: str = "GET"
+    path: str  # 完整路径，如 /api/users
+    query: Dict[str, Any] = Field(default_factory=dict)
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None  # JSON请求体
+
+
+class BatchRequest(SQLModel):
+    """批量请求模型"""
+    requests: List[BatchRequestItem] = Field(min_length=1)
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional
 from app.utils.timezone import utc_timestamp
 from app.models.rbac import Permission
@@ -7,6 +8,10 @@ from app.models.rbac import Permission
 class Menu(SQLModel, table=True):
     """菜单模型"""
     __tablename__ = "menus"
+    __table_args__ = (
+        # 按父菜单查询并按排序号排序的子菜单查询
+        Index("ix_menus_parent_id_sort_order", "parent_id", "sort_order"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
@@ -14,9 +19,10 @@ class Menu(SQLModel, table=True):
     component: Optional[str] = None
     redirect: Optional[str] = None
     icon: Optional[str] = None
-    parent_id: Optional[int] = Field(default=None, foreign_key="menus.id", index=True)
+    parent_id: Optional[int] = Field(default=None, foreign_key="menus.id")
     sort_order: int = Field(default=0)
     is_hidden: bool = Field(default=False)
+    permission_id: Optional[int] = Field(default=None, foreign_key="permissions.id")
     created_at: int = Field(default_factory=utc_timestamp)
     updated_at: int = Field(default_factory=utc_timestamp)
 
@@ -0,0 +1,7 @@
+from sqlmodel import SQLModel, Field
+
+
+class ProfileToggleCreate(SQLModel):
+    """性能分析开关请求模型"""
+    path_prefix: str
+    duration: int = Field(default=60, gt=0, le=3600)  # 开关有效期（秒）
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional, List
 from app.utils.timezone import utc_timestamp
 
@@ -7,6 +8,10 @@ from app.utils.timezone import utc_timestamp
 class UserRole(SQLModel, table=True):
     """用户角色关联模型"""
     __tablename__ = "user_roles"
+    __table_args__ = (
+        # 按角色反查用户的覆盖索引（主键只覆盖 user_id 开头的查询）
+        Index("ix_user_roles_role_id_user_id", "role_id", "user_id"),
+    )
 
     user_id: Optional[int] = Field(
         default=None, foreign_key="users.id", primary_key=True
@@ -20,6 +25,10 @@ class UserRole(SQLModel, table=True):
 class RolePermission(SQLModel, table=True):
     """角色权限关联模型"""
     __tablename__ = "role_permissions"
+    __table_args__ = (
+        # 按权限反查角色的覆盖索引（主键只覆盖 role_id 开头的查询）
+        Index("ix_role_permissions_permission_id_role_id", "permission_id", "role_id"),
+    )
 
     role_id: Optional[int] = Field(
         default=None, foreign_key="roles.id", primary_key=True
@@ -0,0 +1,11 @@
+from sqlmodel import SQLModel, Field
+from app.utils.timezone import utc_timestamp
+
+
+class SeedVersion(SQLModel, table=True):
+    """种子数据版本模型"""
+    __tablename__ = "seed_versions"
+
+    name: str = Field(primary_key=True)
+    fingerprint: str
+    applied_at: int = Field(default_factory=utc_timestamp)
@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel
+from typing import Optional
+
+
+class TokenRefresh(SQLModel):
+    """刷新令牌请求模型"""
+    refresh_token: str
+
+
+class TokenRevoke(SQLModel):
+    """注销请求模型"""
+    refresh_token: Optional[str] = None
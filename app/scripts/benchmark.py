@@ -0,0 +1,310 @@
+"""API热点路径基准测试
+
+在进程内启动应用（httpx ASGITransport + 临时SQLite + fakeredis），写入指定规模的数据后
+按给定并发压测各接口，输出吞吐量和延迟分位数的JSON结果，便于在不同提交之间对比。
+
+使用方式：
+```
+python -m app.scripts.benchmark --output bench.json
+python -m app.scripts.benchmark --users 20000 --menu-depth 4 --menu-fanout 6 --concurrency 32
+python -m app.scripts.benchmark --redis local --only users_list menus_tree
+```
+
+需要安装httpx和fakeredis（--redis local 时使用配置中的真实Redis）。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 压测账号的用户名前缀和密码
+BENCH_PREFIX = "bench"
+BENCH_PASSWORD = "bench123"
+
+Scenario = Callable[[Any, Dict[str, Any], int], Awaitable[Any]]
+
+
+def _configure_environment(database_path: str):
+    """在导入应用之前通过环境变量覆盖配置"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["DEBUG"] = "false"  # 关闭SQL回显，避免日志影响结果
+    os.environ["STARTUP_LOCK_BACKEND"] = "none"
+    os.environ["PROFILING_ENABLED"] = "false"
+    # 登录压测需要放开限流
+    os.environ["LOGIN_MAX_ATTEMPTS_PER_USER"] = "1000000000"
+    os.environ["LOGIN_MAX_ATTEMPTS_PER_IP"] = "1000000000"
+
+
+def _use_fakeredis():
+    """将全局Redis客户端替换为fakeredis，必须在导入其他应用模块之前调用"""
+    import fakeredis
+    import app.core.redis as redis_module
+
+    server = fakeredis.FakeServer()
+    redis_module.async_redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    redis_module.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+    async def close():
+        await redis_module.async_redis_client.aclose()
+
+    redis_module.close_async_redis = close
+
+
+def _seed(users: int, roles: int, permissions: int, menu_depth: int, menu_fanout: int) -> Dict[str, Any]:
+    """通过数据生成脚本批量写入压测数据"""
+    from sqlmodel import Session, select
+    from app.core.database import engine
+    from app.models.rbac import User
+    from app.scripts.generate_data import generate
+
+    summary = generate(
+        engine,
+        users=users,
+        roles=roles,
+        permissions=permissions,
+        permissions_per_role=permissions // 2,
+        menu_roots=menu_fanout,
+        menu_depth=menu_depth,
+        menu_fanout=menu_fanout,
+        prefix=BENCH_PREFIX,
+        password=BENCH_PASSWORD,
+    )
+    with Session(engine) as db:
+        user_ids = db.exec(select(User.id).where(User.username.startswith(BENCH_PREFIX))).all()
+    return {"user_ids": user_ids, "menus": summary["menus"]}
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩法计算分位数"""
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def _run_scenario(client: Any, state: Dict[str, Any], scenario: Scenario, requests: int, concurrency: int,
+                        warmup: int) -> Dict[str, Any]:
+    """按给定并发执行场景，返回吞吐量和延迟统计（毫秒）"""
+    sequence = count()
+
+    async def one() -> float:
+        start = time.perf_counter()
+        response = await scenario(client, state, next(sequence))
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}")
+        return elapsed
+
+    for _ in range(warmup):
+        await one()
+
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            try:
+                latencies.append(await one())
+            except RuntimeError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "duration_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else None,
+        "p50_ms": round(_percentile(ms, 50), 3) if ms else None,
+        "p90_ms": round(_percentile(ms, 90), 3) if ms else None,
+        "p99_ms": round(_percentile(ms, 99), 3) if ms else None,
+        "max_ms": round(ms[-1], 3) if ms else None,
+    }
+
+
+# ==================== 压测场景 ====================
+async def _login(client, state, i):
+    from app.scripts.generate_data import username
+    return await client.post(
+        "/api/token", data={"username": username(BENCH_PREFIX, i % state["users"]), "password": BENCH_PASSWORD}
+    )
+
+
+async def _users_list(client, state, i):
+    return await client.get("/api/users", params={"limit": 100}, headers=state["admin"])
+
+
+async def _users_read(client, state, i):
+    user_id = state["user_ids"][i % len(state["user_ids"])]
+    return await client.get(f"/api/users/{user_id}", headers=state["admin"])
+
+
+async def _users_create(client, state, i):
+    return await client.post("/api/users", headers=state["admin"], json={
+        "username": f"created{i}", "email": f"created{i}@example.com", "password": BENCH_PASSWORD
+    })
+
+
+async def _users_update(client, state, i):
+    user_id = state["user_ids"][i % len(state["user_ids"])]
+    return await client.put(f"/api/users/{user_id}", headers=state["admin"], json={"full_name": f"更新{i}"})
+
+
+async def _menus_list(client, state, i):
+    return await client.get("/api/menus", headers=state["admin"])
+
+
+async def _menus_tree(client, state, i):
+    return await client.get("/api/menus/tree", headers=state["admin"])
+
+
+async def _menus_user_tree(client, state, i):
+    return await client.get("/api/menus/user-tree", headers=state["member"])
+
+
+async def _menus_create(client, state, i):
+    response = await client.post("/api/menus", headers=state["admin"], json={"name": f"新菜单{i}", "path": f"/new/{i}"})
+    if response.status_code == 200:
+        state["created_menus"].append(response.json()["id"])
+    return response
+
+
+async def _menus_update(client, state, i):
+    menu_id = state["created_menus"][i % len(state["created_menus"])]
+    return await client.put(f"/api/menus/{menu_id}", headers=state["admin"], json={"sort_order": i})
+
+
+async def _menus_delete(client, state, i):
+    return await client.delete(f"/api/menus/{state['created_menus'].pop()}", headers=state["admin"])
+
+
+# 场景名称 -> (场景函数, 请求数倍率)；登录和创建用户受bcrypt限制，请求数较少
+SCENARIOS: Dict[str, Any] = {
+    "token": (_login, 0.1),
+    "users_list": (_users_list, 1),
+    "users_read": (_users_read, 1),
+    "users_create": (_users_create, 0.1),
+    "users_update": (_users_update, 1),
+    "menus_list": (_menus_list, 1),
+    "menus_tree": (_menus_tree, 1),
+    "menus_user_tree": (_menus_user_tree, 1),
+    "menus_create": (_menus_create, 1),
+    "menus_update": (_menus_update, 1),
+    "menus_delete": (_menus_delete, 1),
+}
+
+
+async def _benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    from app.main import app
+    from app.scripts.generate_data import username
+
+    async with app.router.lifespan_context(app):
+        seed_start = time.perf_counter()
+        seeded = _seed(args.users, args.roles, args.permissions, args.menu_depth, args.menu_fanout)
+        seed_seconds = time.perf_counter() - seed_start
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def token(username: str, password: str) -> Dict[str, str]:
+                response = await client.post("/api/token", data={"username": username, "password": password})
+                response.raise_for_status()
+                return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            state = {
+                "users": args.users,
+                "user_ids": seeded["user_ids"],
+                "admin": await token("admin", "admin123"),
+                "member": await token(username(BENCH_PREFIX, 0), BENCH_PASSWORD),
+                "created_menus": [],
+            }
+
+            results = {}
+            for name, (scenario, ratio) in SCENARIOS.items():
+                if args.only and name not in args.only:
+                    continue
+                requests = max(1, int(args.requests * ratio))
+                warmup = 0 if name in ("menus_create", "menus_delete") else min(args.warmup, requests)
+                # 删除场景只能删除已创建的菜单
+                if name == "menus_delete":
+                    requests = min(requests, len(state["created_menus"]))
+                if name == "menus_update" and not state["created_menus"]:
+                    continue
+                results[name] = await _run_scenario(client, state, scenario, requests, args.concurrency, warmup)
+                print(f"{name:<16} {results[name]['throughput_rps']:>10} req/s  "
+                      f"p50 {results[name]['p50_ms']} ms  p99 {results[name]['p99_ms']} ms", file=sys.stderr)
+
+    return {"seed_seconds": round(seed_seconds, 3), "menus": seeded["menus"], "results": results}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API热点路径基准测试")
+    parser.add_argument("--users", type=int, default=2000, help="压测用户数")
+    parser.add_argument("--roles", type=int, default=20, help="压测角色数")
+    parser.add_argument("--permissions", type=int, default=100, help="压测权限数")
+    parser.add_argument("--menu-depth", type=int, default=3, help="菜单树深度")
+    parser.add_argument("--menu-fanout", type=int, default=5, help="每个菜单的子菜单数")
+    parser.add_argument("--requests", type=int, default=500, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发数")
+    parser.add_argument("--warmup", type=int, default=20, help="每个场景的预热请求数（不计入结果）")
+    parser.add_argument("--redis", choices=["fake", "local"], default="fake", help="使用fakeredis或配置中的Redis")
+    parser.add_argument("--only", nargs="*", choices=list(SCENARIOS), help="只运行指定场景")
+    parser.add_argument("--output", help="结果输出文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_environment(os.path.join(tmp, "bench.db"))
+        if args.redis == "fake":
+            _use_fakeredis()
+        report = asyncio.run(_benchmark(args))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "redis": args.redis,
+            "users": args.users,
+            "roles": args.roles,
+            "permissions": args.permissions,
+            "menu_depth": args.menu_depth,
+            "menu_fanout": args.menu_fanout,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        **report,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""服务层查询计划检查
+
+在临时SQLite数据库上执行各服务方法，捕获其发出的SQL，逐条执行 EXPLAIN QUERY PLAN，
+出现全表扫描或为排序建立临时B树时报告并以非零状态退出。
+
+使用方式：
+```
+python -m app.scripts.check_query_plans
+```
+"""
+import asyncio
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+from app.models.rbac import (
+    User, UserCreate, UserUpdate, Role, RoleCreate, Permission, PermissionCreate, UserRole, RolePermission
+)
+from app.models.menu import Menu, MenuCreate
+from app.services import UserService, RoleService, PermissionService, MenuService
+from app.core.auth import check_permission, build_token_claims
+
+# 允许的全表扫描（调用方 -> 计划）：无过滤条件的分页列表查询本身就是按顺序扫描，
+# 只豁免这些明确列出的语句，其他带LIMIT的查询出现扫描仍然报告
+ALLOWED_SCANS = {
+    ("UserService.get_users", "SCAN users"),
+    ("RoleService.get_roles", "SCAN roles"),
+    ("PermissionService.get_permissions", "SCAN permissions"),
+    ("MenuService.get_menus", "SCAN menus"),
+}
+
+# 计划中的问题模式：全表（或全索引）扫描、为 ORDER BY 建立临时B树
+BAD_PLAN = re.compile(r"^SCAN |USE TEMP B-TREE FOR ORDER BY")
+
+Captured = Tuple[str, str, Any]
+
+
+def _seed(db: Session) -> Dict[str, int]:
+    """写入少量数据，保证每个查询都能命中真实行"""
+    perms = [Permission(name=f"权限{i}", code=f"perm:{i}") for i in range(4)]
+    roles = [Role(name=f"角色{i}", code=f"role:{i}") for i in range(2)]
+    user = User(username="plan", email="plan@example.com", password="x")
+    db.add_all([*perms, *roles, user])
+    db.commit()
+
+    db.add_all([RolePermission(role_id=roles[0].id, permission_id=p.id) for p in perms[:2]])
+    db.add(UserRole(user_id=user.id, role_id=roles[0].id))
+    root = Menu(name="系统", path="/system", permission_id=perms[0].id)
+    db.add(root)
+    db.commit()
+    db.add_all([Menu(name=f"子菜单{i}", path=f"/system/{i}", parent_id=root.id, sort_order=i) for i in range(3)])
+    db.commit()
+
+    return {"user": user.id, "role": roles[0].id, "role2": roles[1].id, "perm": perms[0].id, "perm3": perms[3].id, "menu": root.id}
+
+
+async def _exercise(db: Session, ids: Dict[str, int], mark) -> None:
+    """依次调用各服务方法"""
+    mark("UserService.get_users")
+    await UserService.get_users(db)
+    mark("UserService.get_user_by_username")
+    await UserService.get_user_by_username(db, "plan")
+    mark("UserService.get_user_by_email")
+    await UserService.get_user_by_email(db, "plan@example.com")
+    mark("UserService.update_user")
+    await UserService.update_user(db, ids["user"], UserUpdate(full_name="计划"))
+    mark("UserService.assign_role")
+    await UserService.assign_role(db, ids["user"], ids["role2"])
+    mark("UserService.remove_role")
+    await UserService.remove_role(db, ids["user"], ids["role2"])
+
+    mark("RoleService.get_roles")
+    await RoleService.get_roles(db)
+    mark("RoleService.get_role_by_code")
+    await RoleService.get_role_by_code(db, "role:0")
+    mark("RoleService.get_role_by_name")
+    await RoleService.get_role_by_name(db, "角色0")
+    mark("RoleService.assign_permission")
+    await RoleService.assign_permission(db, ids["role2"], ids["perm3"])
+    mark("RoleService.remove_permission")
+    await RoleService.remove_permission(db, ids["role2"], ids["perm3"])
+
+    mark("PermissionService.get_permissions")
+    await PermissionService.get_permissions(db)
+    mark("PermissionService.get_permission_by_code")
+    await PermissionService.get_permission_by_code(db, "perm:0")
+    mark("PermissionService.get_permission_by_name")
+    await PermissionService.get_permission_by_name(db, "权限0")
+
+    mark("MenuService.get_menus")
+    await MenuService.get_menus(db)
+    mark("MenuService.get_menu_tree")
+    await MenuService.get_menu_tree(db)
+    mark("MenuService.get_user_menu_tree")
+    await MenuService.get_user_menu_tree(db, ids["user"])
+
+    user = db.get(User, ids["user"])
+    mark("auth.check_permission")
+    await check_permission(user, "perm:1", db)
+    mark("auth.build_token_claims")
+    await build_token_claims(user, db)
+
+    # 删除类操作放在最后，使用临时数据
+    temp_user = await UserService.create_user(db, UserCreate(username="tmp", email="tmp@example.com", password="x"))
+    temp_role = await RoleService.create_role(db, RoleCreate(name="临时", code="tmp"))
+    temp_perm = await PermissionService.create_permission(db, PermissionCreate(name="临时", code="tmp"))
+    temp_menu = await MenuService.create_menu(db, MenuCreate(name="临时", path="/tmp", parent_id=ids["menu"]))
+    mark("UserService.delete_user")
+    await UserService.delete_user(db, temp_user.id)
+    mark("RoleService.delete_role")
+    await RoleService.delete_role(db, temp_role.id)
+    mark("PermissionService.delete_permission")
+    await PermissionService.delete_permission(db, temp_perm.id)
+    mark("MenuService.delete_menu")
+    await MenuService.delete_menu(db, temp_menu.id)
+
+
+def check_query_plans(database_path: Optional[Path] = None) -> List[str]:
+    """执行检查，返回问题列表"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = database_path or Path(tmp) / "plans.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+
+        captured: List[Captured] = []
+        current = {"caller": None}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _capture(conn, cursor, statement, parameters, context, executemany):
+            if current["caller"] and not executemany and not statement.startswith("EXPLAIN"):
+                captured.append((current["caller"], statement, parameters))
+
+        with Session(engine) as db:
+            ids = _seed(db)
+            asyncio.run(_exercise(db, ids, lambda caller: current.update(caller=caller)))
+
+        problems = []
+        with engine.connect() as conn:
+            for caller, statement, parameters in captured:
+                if not re.match(r"\s*(SELECT|UPDATE|DELETE)\b", statement, re.IGNORECASE):
+                    continue
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                details = [row[-1] for row in plan]
+                bad = [d for d in details if BAD_PLAN.search(d) and (caller, d) not in ALLOWED_SCANS]
+                if bad:
+                    problems.append(f"{caller}: {' | '.join(bad)}\n    {' '.join(statement.split())}")
+        engine.dispose()
+    return problems
+
+
+if __name__ == "__main__":
+    problems = check_query_plans()
+    for problem in problems:
+        print(problem)
+    print(f"发现 {len(problems)} 个查询计划问题" if problems else "所有查询均使用索引")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,255 @@
+"""大规模测试数据生成
+
+按配置数量批量生成用户、角色、权限、关联关系和菜单树，用于在本地复现生产规模做容量测试。
+所有用户共用一个预先计算的密码哈希，数据按批次通过Core批量插入，每批一个事务。
+
+使用方式：
+```
+python -m app.scripts.generate_data --users 1000000 --roles 200 --permissions 500
+python -m app.scripts.generate_data --menu-roots 10 --menu-depth 4 --menu-fanout 5 --prefix load
+```
+
+数据写入配置中的数据库（DATABASE_URL），生成的用户名为 {prefix}{序号:08d}，可重复执行（换用不同前缀）。
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import NullPool
+from app.core.auth import get_password_hash
+from app.models.rbac import User, Role, Permission, UserRole, RolePermission
+from app.models.menu import Menu
+from app.utils.timezone import utc_timestamp
+
+logger = logging.getLogger(__name__)
+
+# 生成用户的默认密码
+DEFAULT_PASSWORD = "password123"
+
+
+def username(prefix: str, index: int) -> str:
+    """第index个生成用户的用户名，序号补零保证按字典序可做范围查询"""
+    return f"{prefix}{index:08d}"
+
+
+def _batches(total: int, size: int) -> Iterator[range]:
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+@contextmanager
+def _bulk_connection(engine: Engine) -> Iterator[Connection]:
+    """批量导入使用的连接
+
+    SQLite下使用独立的不入池连接并放宽持久性要求，显著减少fsync；
+    结束时恢复原日志模式（WAL等日志模式会持久化到数据库文件），连接直接关闭，不会回到应用的连接池。
+    """
+    if engine.dialect.name != "sqlite":
+        with engine.connect() as conn:
+            yield conn
+        return
+
+    bulk_engine = create_engine(engine.url, poolclass=NullPool)
+    try:
+        with bulk_engine.connect() as conn:
+            journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+            try:
+                yield conn
+            finally:
+                conn.rollback()
+                conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+    finally:
+        bulk_engine.dispose()
+
+
+def _insert_permissions(conn: Connection, prefix: str, count: int) -> List[int]:
+    now = utc_timestamp()
+    conn.execute(insert(Permission), [
+        {"name": f"{prefix}权限{i}", "code": f"{prefix}:perm:{i}", "created_at": now, "updated_at": now}
+        for i in range(count)
+    ])
+    return list(conn.execute(
+        select(Permission.id).where(Permission.code.startswith(f"{prefix}:perm:")).order_by(Permission.id)
+    ).scalars())
+
+
+def _insert_roles(conn: Connection, prefix: str, count: int) -> List[int]:
+    now = utc_timestamp()
+    conn.execute(insert(Role), [
+        {"name": f"{prefix}角色{i}", "code": f"{prefix}:role:{i}", "created_at": now, "updated_at": now}
+        for i in range(count)
+    ])
+    return list(conn.execute(
+        select(Role.id).where(Role.code.startswith(f"{prefix}:role:")).order_by(Role.id)
+    ).scalars())
+
+
+def _insert_menus(
+    conn: Connection, prefix: str, roots: int, depth: int, fanout: int, permission_ids: List[int], rng: random.Random
+) -> int:
+    """逐层插入菜单树，每层一次批量插入，按路径取回ID作为下一层的父菜单"""
+    now = utc_timestamp()
+    total = 0
+    parents: List[Optional[int]] = [None]
+    for level in range(depth):
+        width = roots if level == 0 else fanout
+        rows = [
+            {
+                "name": f"{prefix}菜单{level}-{p}-{i}",
+                "path": f"/{prefix}/{level}/{p}/{i}",
+                "parent_id": parent_id,
+                "sort_order": i,
+                "permission_id": rng.choice(permission_ids) if permission_ids else None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for p, parent_id in enumerate(parents)
+            for i in range(width)
+        ]
+        conn.execute(insert(Menu), rows)
+        parents = list(conn.execute(
+            select(Menu.id).where(Menu.path.startswith(f"/{prefix}/{level}/")).order_by(Menu.id)
+        ).scalars())
+        total += len(rows)
+    return total
+
+
+def generate(
+    engine: Engine,
+    users: int,
+    roles: int,
+    permissions: int,
+    roles_per_user: int = 2,
+    permissions_per_role: int = 20,
+    menu_roots: int = 5,
+    menu_depth: int = 3,
+    menu_fanout: int = 5,
+    prefix: str = "gen",
+    password: str = DEFAULT_PASSWORD,
+    batch_size: int = 10000,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """生成测试数据，返回各类数据的数量和耗时"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+
+    # 只计算一次bcrypt哈希，所有用户共用
+    password_hash = get_password_hash(password)
+
+    with _bulk_connection(engine) as conn:
+        permission_ids = _insert_permissions(conn, prefix, permissions)
+        role_ids = _insert_roles(conn, prefix, roles)
+
+        role_permissions = [
+            {"role_id": role_id, "permission_id": permission_id}
+            for role_id in role_ids
+            for permission_id in rng.sample(permission_ids, min(permissions_per_role, len(permission_ids)))
+        ]
+        for batch in _batches(len(role_permissions), batch_size):
+            conn.execute(insert(RolePermission), role_permissions[batch.start:batch.stop])
+
+        menus = _insert_menus(conn, prefix, menu_roots, menu_depth, menu_fanout, permission_ids, rng)
+        conn.commit()
+        logger.info(f"已生成 {permissions} 个权限、{roles} 个角色、{menus} 个菜单")
+
+        user_roles = 0
+        now = utc_timestamp()
+        for batch in _batches(users, batch_size):
+            conn.execute(insert(User), [
+                {
+                    "username": username(prefix, i),
+                    "email": f"{username(prefix, i)}@example.com",
+                    "password": password_hash,
+                    "full_name": f"测试用户{i}",
+                    "is_active": True,
+                    "is_superuser": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in batch
+            ])
+            if role_ids and roles_per_user:
+                # 用户名按序号补零，按范围取回本批用户ID；限定长度，排除以本前缀开头的其他前缀（如gen0）的用户
+                user_ids = conn.execute(
+                    select(User.id).where(
+                        User.username.between(username(prefix, batch.start), username(prefix, batch.stop - 1)),
+                        func.length(User.username) == len(username(prefix, batch.start)),
+                    )
+                ).scalars()
+                rows = [
+                    {"user_id": user_id, "role_id": role_id}
+                    for user_id in user_ids
+                    for role_id in rng.sample(role_ids, min(roles_per_user, len(role_ids)))
+                ]
+                conn.execute(insert(UserRole), rows)
+                user_roles += len(rows)
+            conn.commit()
+            logger.info(f"已生成 {batch.stop}/{users} 个用户")
+
+    return {
+        "users": users,
+        "roles": roles,
+        "permissions": permissions,
+        "user_roles": user_roles,
+        "role_permissions": len(role_permissions),
+        "menus": menus,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+async def _invalidate_caches():
+    """更新数据版本号，使已有的缓存和令牌声明失效"""
+    from app.core.versions import menu_version, rbac_version, user_version
+    for version in (menu_version, rbac_version, user_version):
+        await version.bump()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成大规模测试数据")
+    parser.add_argument("--users", type=int, default=100000, help="用户数")
+    parser.add_argument("--roles", type=int, default=50, help="角色数")
+    parser.add_argument("--permissions", type=int, default=200, help="权限数")
+    parser.add_argument("--roles-per-user", type=int, default=2, help="每个用户分配的角色数")
+    parser.add_argument("--permissions-per-role", type=int, default=20, help="每个角色分配的权限数")
+    parser.add_argument("--menu-roots", type=int, default=5, help="顶级菜单数")
+    parser.add_argument("--menu-depth", type=int, default=3, help="菜单树深度")
+    parser.add_argument("--menu-fanout", type=int, default=5, help="每个菜单的子菜单数")
+    parser.add_argument("--prefix", default="gen", help="用户名、编码和菜单路径前缀")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="所有生成用户的密码")
+    parser.add_argument("--batch-size", type=int, default=10000, help="每批插入的行数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    from app.core.database import create_db_and_tables, engine
+    create_db_and_tables()
+
+    summary = generate(
+        engine,
+        users=args.users,
+        roles=args.roles,
+        permissions=args.permissions,
+        roles_per_user=args.roles_per_user,
+        permissions_per_role=args.permissions_per_role,
+        menu_roots=args.menu_roots,
+        menu_depth=args.menu_depth,
+        menu_fanout=args.menu_fanout,
+        prefix=args.prefix,
+        password=args.password,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    asyncio.run(_invalidate_caches())
+    logger.info(f"生成完成: {summary}")
+
+
+if __name__ == "__main__":
+    main()
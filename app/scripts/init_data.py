@@ -1,8 +1,14 @@
-from sqlmodel import Session, select
+from sqlmodel import Session, SQLModel, select
+from sqlalchemy import UniqueConstraint, and_, insert, literal, or_, update
+from typing import Dict, List, Any, Type
 from app.models.rbac import User, Role, Permission, UserRole, RolePermission
+from app.models.seed import SeedVersion
 from app.core.auth import get_password_hash
 from app.utils.timezone import utc_timestamp
+import hashlib
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -54,199 +60,144 @@ DEFAULT_PERMISSIONS = [
     }
 ]
 
+# 默认角色权限关系：超级管理员拥有所有权限，普通用户只有用户管理权限
+DEFAULT_ROLE_PERMISSIONS = {
+    "superadmin": [perm["code"] for perm in DEFAULT_PERMISSIONS],
+    "user": ["user:manage"]
+}
 
-async def init_superadmin(db: Session) -> User:
-    """初始化超级管理员"""
-    # 检查是否已存在超级管理员
-    admin = db.exec(
-        select(User).where(User.username == DEFAULT_ADMIN["username"])
-    ).first()
-
-    if admin:
-        logger.info(f"超级管理员 {DEFAULT_ADMIN['username']} 已存在，跳过创建")
-        return admin
-
-    # 创建超级管理员
-    hashed_password = get_password_hash(DEFAULT_ADMIN["password"])
-    admin = User(
-        username=DEFAULT_ADMIN["username"],
-        email=DEFAULT_ADMIN["email"],
-        password=hashed_password,
-        full_name=DEFAULT_ADMIN["full_name"],
-        is_active=DEFAULT_ADMIN["is_active"],
-        is_superuser=DEFAULT_ADMIN["is_superuser"],
-        created_at=utc_timestamp(),
-        updated_at=utc_timestamp()
-    )
-
-    db.add(admin)
-    db.commit()
-    db.refresh(admin)
-
-    logger.info(f"超级管理员 {admin.username} 创建成功")
-    return admin
-
-
-async def init_roles(db: Session) -> dict:
-    """初始化角色"""
-    roles = {}
-
-    for role_data in DEFAULT_ROLES:
-        # 检查角色是否已存在
-        role = db.exec(
-            select(Role).where(Role.code == role_data["code"])
-        ).first()
-
-        if not role:
-            # 创建角色
-            role = Role(
-                name=role_data["name"],
-                code=role_data["code"],
-                description=role_data["description"],
-                created_at=utc_timestamp(),
-                updated_at=utc_timestamp()
-            )
-
-            db.add(role)
-            db.commit()
-            db.refresh(role)
-
-            logger.info(f"角色 {role.name} 创建成功")
-        else:
-            logger.info(f"角色 {role.name} 已存在，跳过创建")
-
-        roles[role.code] = role
-
-    return roles
-
-
-async def init_permissions(db: Session) -> dict:
-    """初始化权限"""
-    permissions = {}
-
-    for perm_data in DEFAULT_PERMISSIONS:
-        # 检查权限是否已存在
-        perm = db.exec(
-            select(Permission).where(Permission.code == perm_data["code"])
-        ).first()
-
-        if not perm:
-            # 创建权限
-            perm = Permission(
-                name=perm_data["name"],
-                code=perm_data["code"],
-                description=perm_data["description"],
-                created_at=utc_timestamp(),
-                updated_at=utc_timestamp()
-            )
-
-            db.add(perm)
-            db.commit()
-            db.refresh(perm)
-
-            logger.info(f"权限 {perm.name} 创建成功")
-        else:
-            logger.info(f"权限 {perm.name} 已存在，跳过创建")
-
-        permissions[perm.code] = perm
-
-    return permissions
-
-
-async def init_role_permissions(db: Session, roles: dict, permissions: dict) -> None:
-    """初始化角色权限关系"""
-    # 为超级管理员角色分配所有权限
-    superadmin_role = roles.get("superadmin")
-    if superadmin_role:
-        for perm in permissions.values():
-            # 检查角色权限关系是否已存在
-            role_perm = db.exec(
-                select(RolePermission).where(
-                    (RolePermission.role_id == superadmin_role.id) &
-                    (RolePermission.permission_id == perm.id)
-                )
-            ).first()
-
-            if not role_perm:
-                # 创建角色权限关系
-                role_perm = RolePermission(
-                    role_id=superadmin_role.id,
-                    permission_id=perm.id
-                )
-
-                db.add(role_perm)
-                logger.info(f"为角色 {superadmin_role.name} 分配权限 {perm.name}")
-
-        db.commit()
+# 默认用户角色关系
+DEFAULT_USER_ROLES = {
+    DEFAULT_ADMIN["username"]: ["superadmin"]
+}
 
-    # 为普通用户角色分配基本权限
-    user_role = roles.get("user")
-    if user_role:
-        # 普通用户只有用户管理权限
-        user_perm = permissions.get("user:manage")
-        if user_perm:
-            # 检查角色权限关系是否已存在
-            role_perm = db.exec(
-                select(RolePermission).where(
-                    (RolePermission.role_id == user_role.id) &
-                    (RolePermission.permission_id == user_perm.id)
-                )
-            ).first()
-
-            if not role_perm:
-                # 创建角色权限关系
-                role_perm = RolePermission(
-                    role_id=user_role.id,
-                    permission_id=user_perm.id
-                )
-
-                db.add(role_perm)
-                db.commit()
-                logger.info(f"为角色 {user_role.name} 分配权限 {user_perm.name}")
-
-
-async def init_user_roles(db: Session, admin: User, roles: dict) -> None:
-    """初始化用户角色关系"""
-    # 为超级管理员分配超级管理员角色
-    superadmin_role = roles.get("superadmin")
-    if superadmin_role:
-        # 检查用户角色关系是否已存在
-        user_role = db.exec(
-            select(UserRole).where(
-                (UserRole.user_id == admin.id) &
-                (UserRole.role_id == superadmin_role.id)
-            )
-        ).first()
-
-        if not user_role:
-            # 创建用户角色关系
-            user_role = UserRole(
-                user_id=admin.id,
-                role_id=superadmin_role.id
-            )
-
-            db.add(user_role)
-            db.commit()
-            logger.info(f"为用户 {admin.username} 分配角色 {superadmin_role.name}")
+# 种子数据版本名称
+SEED_NAME = "init_data"
 
 
-async def init_data(db: Session) -> None:
-    """初始化数据"""
-    logger.info("开始初始化数据...")
+def seed_fingerprint() -> str:
+    """计算默认数据的指纹，默认数据变化时指纹随之变化"""
+    payload = {
+        "admin": {k: v for k, v in DEFAULT_ADMIN.items() if k != "password"},
+        "roles": DEFAULT_ROLES,
+        "permissions": DEFAULT_PERMISSIONS,
+        "role_permissions": DEFAULT_ROLE_PERMISSIONS,
+        "user_roles": DEFAULT_USER_ROLES
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _insert_ignore(db: Session, model: Type[SQLModel], rows: List[Dict[str, Any]]) -> None:
+    """批量插入，已存在（违反唯一约束）的行直接跳过"""
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model).on_conflict_do_nothing()
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model).on_conflict_do_nothing()
+    elif dialect in ("mysql", "mariadb"):
+        stmt = insert(model).prefix_with("IGNORE")
+    else:
+        # 其他数据库：先查询再插入不存在的行
+        rows = [row for row in rows if not _exists(db, model, row)]
+        if not rows:
+            return
+        stmt = insert(model)
+
+    db.connection().execute(stmt, rows)
+
+
+def _exists(db: Session, model: Type[SQLModel], row: Dict[str, Any]) -> bool:
+    """按主键或任一唯一列判断行是否已存在"""
+    table = model.__table__
+    keys = [[column.name for column in table.primary_key.columns]]
+    keys += [[column.name] for column in table.columns if column.unique]
+    keys += [[column.name for column in constraint.columns] for constraint in table.constraints
+             if isinstance(constraint, UniqueConstraint)]
+    keys += [[column.name for column in index.columns] for index in table.indexes if index.unique]
+
+    conditions = [
+        and_(*(table.c[name] == row[name] for name in key))
+        for key in keys if key and all(name in row for name in key)
+    ]
+    if not conditions:
+        return False
+    return db.connection().execute(select(literal(1)).select_from(table).where(or_(*conditions)).limit(1)).first() is not None
+
+
+def _seed(db: Session) -> None:
+    """在当前事务中批量写入默认数据"""
+    now = utc_timestamp()
+
+    # 超级管理员：仅在不存在时计算密码哈希
+    admin_id = db.exec(select(User.id).where(User.username == DEFAULT_ADMIN["username"])).first()
+    if admin_id is None:
+        _insert_ignore(db, User, [{
+            **DEFAULT_ADMIN,
+            "password": get_password_hash(DEFAULT_ADMIN["password"]),
+            "created_at": now,
+            "updated_at": now
+        }])
+        logger.info(f"超级管理员 {DEFAULT_ADMIN['username']} 创建成功")
+
+    # 角色和权限
+    _insert_ignore(db, Role, [{**role, "created_at": now, "updated_at": now} for role in DEFAULT_ROLES])
+    _insert_ignore(db, Permission, [{**perm, "created_at": now, "updated_at": now} for perm in DEFAULT_PERMISSIONS])
+
+    role_ids = dict(db.exec(
+        select(Role.code, Role.id).where(Role.code.in_([role["code"] for role in DEFAULT_ROLES]))
+    ).all())
+    permission_ids = dict(db.exec(
+        select(Permission.code, Permission.id).where(Permission.code.in_([perm["code"] for perm in DEFAULT_PERMISSIONS]))
+    ).all())
+    user_ids = dict(db.exec(
+        select(User.username, User.id).where(User.username.in_(list(DEFAULT_USER_ROLES)))
+    ).all())
+
+    # 角色权限关系和用户角色关系
+    _insert_ignore(db, RolePermission, [
+        {"role_id": role_ids[role_code], "permission_id": permission_ids[perm_code]}
+        for role_code, perm_codes in DEFAULT_ROLE_PERMISSIONS.items()
+        for perm_code in perm_codes
+    ])
+    _insert_ignore(db, UserRole, [
+        {"user_id": user_ids[username], "role_id": role_ids[role_code]}
+        for username, role_codes in DEFAULT_USER_ROLES.items()
+        for role_code in role_codes
+    ])
 
-    # 初始化超级管理员
-    admin = await init_superadmin(db)
 
-    # 初始化角色
-    roles = await init_roles(db)
+async def init_data(db: Session) -> None:
+    """初始化数据
 
-    # 初始化权限
-    permissions = await init_permissions(db)
+    默认数据指纹与数据库中记录一致时只需一次查询即可跳过；
+    否则在单个事务中批量写入（已存在的数据会被跳过），并记录新的指纹。
+    """
+    started = time.perf_counter()
+    fingerprint = seed_fingerprint()
 
-    # 初始化角色权限关系
-    await init_role_permissions(db, roles, permissions)
+    applied = db.exec(select(SeedVersion.fingerprint).where(SeedVersion.name == SEED_NAME)).first()
+    if applied == fingerprint:
+        logger.info(f"默认数据已是最新，跳过初始化（{(time.perf_counter() - started) * 1000:.1f}ms）")
+        return
 
-    # 初始化用户角色关系
-    await init_user_roles(db, admin, roles)
+    logger.info("开始初始化数据...")
+    try:
+        _seed(db)
+        _insert_ignore(db, SeedVersion, [{"name": SEED_NAME, "fingerprint": fingerprint, "applied_at": utc_timestamp()}])
+        db.connection().execute(
+            update(SeedVersion)
+            .where(SeedVersion.name == SEED_NAME)
+            .values(fingerprint=fingerprint, applied_at=utc_timestamp())
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    logger.info("数据初始化完成")
\ No newline at end of file
+    logger.info(f"数据初始化完成（{(time.perf_counter() - started) * 1000:.1f}ms）")
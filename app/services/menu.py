@@ -1,5 +1,13 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
-from typing import List, Optional, Dict, Any, Set
+from typing import Callable, List, Optional, Dict, Any, Set
+from app.core.auth import get_rbac_version
+from app.core.config import settings
+from app.core.database import engine
+from app.core.redis import RedisCache
+from app.core.serialization import json_dumps
+from app.core.singleflight import single_flight
+from app.core.versions import menu_version
 from app.models.menu import Menu, MenuCreate, MenuUpdate
 from app.models.rbac import User, Role, UserRole, Permission, RolePermission
 from app.utils.timezone import utc_timestamp
@@ -21,6 +29,11 @@ class MenuService:
     @staticmethod
     async def get_menu_tree(db: Session) -> List[Dict[str, Any]]:
         """获取完整菜单树"""
+        return MenuService._build_menu_tree(db)
+
+    @staticmethod
+    def _build_menu_tree(db: Session) -> List[Dict[str, Any]]:
+        """构建完整菜单树（同步，可在线程池中执行）"""
         # 获取所有顶级菜单
         root_menus = db.exec(select(Menu).where(Menu.parent_id == None).order_by(Menu.sort_order)).all()
 
@@ -33,9 +46,70 @@ class MenuService:
 
         return result
 
+    @staticmethod
+    async def get_menu_version() -> Optional[str]:
+        """获取菜单版本号，Redis不可用且本地无缓存时返回None"""
+        return await menu_version.get()
+
+    @staticmethod
+    async def bump_menu_version() -> str:
+        """更新菜单版本号，使已缓存的菜单树失效"""
+        return await menu_version.bump()
+
+    @staticmethod
+    async def get_menu_tree_json() -> bytes:
+        """获取序列化后的完整菜单树，命中缓存时直接返回"""
+        version = await menu_version.current()
+        key = f"menu:tree:{version}"
+        return await MenuService._cached_json(key, MenuService._build_menu_tree)
+
+    @staticmethod
+    async def get_user_menu_tree_json(db: Session, user_id: int) -> bytes:
+        """获取序列化后的用户菜单树，按菜单版本和RBAC版本缓存"""
+        menus = await menu_version.current()
+        rbac = await get_rbac_version()
+        if rbac is None:
+            return json_dumps(await MenuService.get_user_menu_tree(db, user_id))
+
+        key = f"menu:user-tree:{user_id}:{menus}:{rbac}"
+        return await MenuService._cached_json(key, lambda db: MenuService._build_user_menu_tree(db, user_id))
+
+    @staticmethod
+    async def _cached_json(key: str, build: Callable[[Session], Any]) -> bytes:
+        """读取缓存的JSON，未命中时合并并发请求，只由一个请求构建并写入缓存
+
+        build为接收数据库会话的同步函数，在线程池中执行，构建期间事件循环可继续处理其他请求。
+        合并的计算在发起请求被取消后仍会继续，因此使用独立的会话，而不是随请求关闭的会话。
+        """
+        async def recheck() -> Optional[bytes]:
+            cached = await RedisCache.get(key)
+            return cached.encode() if cached is not None else None
+
+        cached = await recheck()
+        if cached is not None:
+            return cached
+
+        async def compute() -> bytes:
+            data = json_dumps(await run_in_threadpool(MenuService._build_with_session, build))
+            await RedisCache.set(key, data.decode(), settings.MENU_TREE_CACHE_TTL)
+            return data
+
+        return await single_flight.do(key, compute, recheck=recheck)
+
+    @staticmethod
+    def _build_with_session(build: Callable[[Session], Any]) -> Any:
+        """在独立的数据库会话中执行build"""
+        with Session(engine) as db:
+            return build(db)
+
     @staticmethod
     async def get_user_menu_tree(db: Session, user_id: int) -> List[Dict[str, Any]]:
         """根据用户ID获取有权限访问的菜单树"""
+        return MenuService._build_user_menu_tree(db, user_id)
+
+    @staticmethod
+    def _build_user_menu_tree(db: Session, user_id: int) -> List[Dict[str, Any]]:
+        """构建用户有权限访问的菜单树（同步，可在线程池中执行）"""
         # 获取用户
         user = db.get(User, user_id)
         if not user:
@@ -43,10 +117,10 @@ class MenuService:
 
         # 超级管理员可以访问所有菜单
         if user.is_superuser:
-            return await MenuService.get_menu_tree(db)
+            return MenuService._build_menu_tree(db)
 
         # 获取用户的权限代码集合
-        permission_codes = await MenuService._get_user_permission_codes(db, user_id)
+        permission_codes = MenuService._get_user_permission_codes(db, user_id)
 
         # 获取所有顶级菜单
         root_menus = db.exec(select(Menu).where(Menu.parent_id == None).order_by(Menu.sort_order)).all()
@@ -72,7 +146,7 @@ class MenuService:
         return result
 
     @staticmethod
-    async def _get_user_permission_codes(db: Session, user_id: int) -> Set[str]:
+    def _get_user_permission_codes(db: Session, user_id: int) -> Set[str]:
         """获取用户的所有权限代码"""
         # 获取用户角色
         user_roles = db.exec(
@@ -173,6 +247,7 @@ class MenuService:
         db.add(db_menu)
         db.commit()
         db.refresh(db_menu)
+        await MenuService.bump_menu_version()
 
         return db_menu
 
@@ -194,6 +269,7 @@ class MenuService:
         db.add(db_menu)
         db.commit()
         db.refresh(db_menu)
+        await MenuService.bump_menu_version()
 
         return db_menu
 
@@ -211,5 +287,6 @@ class MenuService:
 
         db.delete(db_menu)
         db.commit()
+        await MenuService.bump_menu_version()
 
         return db_menu
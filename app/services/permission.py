@@ -1,6 +1,8 @@
 from sqlmodel import Session, select
 from typing import List, Optional
 from app.models.rbac import Permission, PermissionCreate, PermissionUpdate, RolePermission
+from app.core.auth import bump_rbac_version
+from app.core.versions import menu_version
 from app.utils.timezone import utc_timestamp
 
 
@@ -60,6 +62,9 @@ class PermissionService:
         db.add(db_permission)
         db.commit()
         db.refresh(db_permission)
+        # 权限代码映射和菜单树中的权限代码/名称随之失效
+        await bump_rbac_version()
+        await menu_version.bump()
         
         return db_permission
     
@@ -77,5 +82,7 @@ class PermissionService:
         
         db.delete(db_permission)
         db.commit()
+        await bump_rbac_version()
+        await menu_version.bump()
         
         return db_permission
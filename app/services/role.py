@@ -1,6 +1,7 @@
 from sqlmodel import Session, select
 from typing import List, Optional
 from app.models.rbac import Role, RoleCreate, RoleUpdate, UserRole, RolePermission
+from app.core.auth import bump_rbac_version
 from app.utils.timezone import utc_timestamp
 
 
@@ -82,6 +83,7 @@ class RoleService:
         
         db.delete(db_role)
         db.commit()
+        await bump_rbac_version()
         
         return db_role
     
@@ -103,6 +105,7 @@ class RoleService:
         role_permission = RolePermission(role_id=role_id, permission_id=permission_id)
         db.add(role_permission)
         db.commit()
+        await bump_rbac_version()
         
         return True
     
@@ -123,5 +126,6 @@ class RoleService:
         # 移除权限
         db.delete(role_permission)
         db.commit()
+        await bump_rbac_version()
         
         return True
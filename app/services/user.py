@@ -1,7 +1,8 @@
 from sqlmodel import Session, select
 from typing import List, Optional
 from app.models.rbac import User, UserCreate, UserUpdate, UserRole
-from app.core.auth import get_password_hash
+from app.core.auth import get_password_hash, bump_rbac_version
+from app.core.versions import user_version
 from app.utils.timezone import utc_timestamp
 
 
@@ -44,6 +45,7 @@ class UserService:
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        await user_version.bump()
         
         return db_user
     
@@ -69,6 +71,11 @@ class UserService:
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        await user_version.bump()
+        
+        # 状态或超管标记变化时使令牌声明失效
+        if "is_active" in user_data or "is_superuser" in user_data:
+            await bump_rbac_version()
         
         return db_user
     
@@ -86,6 +93,8 @@ class UserService:
         
         db.delete(db_user)
         db.commit()
+        await user_version.bump()
+        await bump_rbac_version()
         
         return db_user
     
@@ -107,6 +116,7 @@ class UserService:
         user_role = UserRole(user_id=user_id, role_id=role_id)
         db.add(user_role)
         db.commit()
+        await bump_rbac_version()
         
         return True
     
@@ -127,5 +137,6 @@ class UserService:
         # 移除角色
         db.delete(user_role)
         db.commit()
+        await bump_rbac_version()
         
         return True
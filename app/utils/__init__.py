@@ -1,7 +1,9 @@
 from app.utils.timezone import (
     utc_now, utc_timestamp, timestamp_to_datetime, datetime_to_timestamp
 )
+from app.utils.bloom import BloomFilter
 
 __all__ = [
-    "utc_now", "utc_timestamp", "timestamp_to_datetime", "datetime_to_timestamp"
+    "utc_now", "utc_timestamp", "timestamp_to_datetime", "datetime_to_timestamp",
+    "BloomFilter"
 ]
@@ -0,0 +1,97 @@
+"""生产环境启动入口
+
+在主进程中执行一次建表和初始化数据，然后按配置启动多个uvicorn worker。
+
+使用方式：
+```
+python serve.py
+SERVER_WORKERS=8 SERVER_PORT=8080 python serve.py
+```
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+import uvicorn
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def worker_count() -> int:
+    """worker数量，未配置时取当前进程可用的CPU数"""
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # 非Linux平台
+        return os.cpu_count() or 1
+
+
+def _select(option: str, fast: str, fallback: str) -> str:
+    """auto时在安装了加速实现的情况下使用它，否则使用纯Python实现"""
+    if option != "auto":
+        return option
+    return fast if importlib.util.find_spec(fast) is not None else fallback
+
+
+async def _prepare():
+    """在主进程中建表和初始化数据，完成后释放连接，worker启动时通过就绪标记跳过"""
+    from app.core.database import engine
+    from app.core.redis import close_async_redis
+    from app.core.startup import coordinate_startup
+    from app.main import prepare_database, startup_marker
+
+    try:
+        await coordinate_startup(prepare_database, startup_marker())
+    finally:
+        engine.dispose()
+        await close_async_redis()
+
+
+def _prepare_metrics_dir(workers: int):
+    """多worker时为Prometheus多进程模式准备指标目录（须在worker导入prometheus_client之前、主进程准备完成之后设置）"""
+    if workers <= 1 or not settings.METRICS_ENABLED:
+        return
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"fastapi-metrics-{settings.SERVER_PORT}")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    # 清理上次运行遗留的指标文件
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    workers = worker_count()
+    loop = _select(settings.SERVER_LOOP, "uvloop", "asyncio")
+    http = _select(settings.SERVER_HTTP, "httptools", "h11")
+
+    # 先在主进程完成准备再设置指标目录：主进程导入应用时创建的指标（如连接池大小）不会写入多进程目录，
+    # 外部已设置目录时主进程写入的文件也会随目录一起清理，不会在汇总中一直计入主进程的数值
+    asyncio.run(_prepare())
+    _prepare_metrics_dir(workers)
+
+    logger.info(f"启动 {workers} 个worker（loop={loop}, http={http}）")
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        limit_max_requests=settings.SERVER_LIMIT_MAX_REQUESTS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        access_log=settings.SERVER_ACCESS_LOG,
+        server_header=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
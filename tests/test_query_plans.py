@@ -0,0 +1,7 @@
+"""服务层查询计划检查，规则见 app.scripts.check_query_plans"""
+from app.scripts.check_query_plans import check_query_plans
+
+
+def test_service_queries_use_indexes():
+    problems = check_query_plans()
+    assert not problems, "\n".join(problems)